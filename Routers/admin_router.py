@@ -1,42 +1,70 @@
 from fastapi import APIRouter, HTTPException, Depends
 from db_config import db
 from bson import ObjectId
-from auth import get_current_admin
+from models import UserOut, UserDeleted, PurgeJobOut, OrphanSweepOut, MessageOut, UserCount, AdminStats
+from auth import get_current_admin, invalidate_principal, principal_cache
+from operations import invalidate_user_key, key_cache_stats
+from hashing import hash_stats
+from purge import start_purge, get_purge, sweep_orphans
 
 users_collection = db["users"]
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
-@router.get("/users")
-def list_users(admin_id: str = Depends(get_current_admin)):
+@router.get("/users", response_model=list[UserOut])
+async def list_users(admin_id: str = Depends(get_current_admin)):
     users = users_collection.find()
     return [{
         "id": str(u["_id"]),
         "email": u["username"],
         "is_admin": u.get("is_admin", False)
-    } for u in users]
+    } async for u in users]
 
-@router.delete("/user/{user_id}")
-def delete_user(user_id: str, admin_id: str = Depends(get_current_admin)):
-    result = users_collection.delete_one({"_id": ObjectId(user_id)})
-    if result.deleted_count == 0:
+@router.delete("/user/{user_id}", response_model=UserDeleted)
+async def delete_user(user_id: str, admin_id: str = Depends(get_current_admin)):
+    user = await users_collection.find_one_and_delete({"_id": ObjectId(user_id)})
+    if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return {"message": "User deleted successfully"}
+    invalidate_user_key(user_id)
+    invalidate_principal(user_id)
+    # The user's vault items and pepper are removed in the background
+    job_id = await start_purge(user_id, user["username"])
+    return {"message": "User deleted successfully", "purge_job": job_id}
 
-@router.put("/rename/{user_id}")
-def rename_user(user_id: str, new_email: str, admin_id: str = Depends(get_current_admin)):
+@router.get("/purge/{job_id}", response_model=PurgeJobOut)
+async def purge_status(job_id: str, admin_id: str = Depends(get_current_admin)):
+    job = await get_purge(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Purge job not found")
+    return job
+
+@router.post("/purge/orphans", response_model=OrphanSweepOut)
+async def purge_orphans(admin_id: str = Depends(get_current_admin)):
+    return await sweep_orphans()
+
+@router.put("/rename/{user_id}", response_model=MessageOut)
+async def rename_user(user_id: str, new_email: str, admin_id: str = Depends(get_current_admin)):
     new_email = new_email.strip().lower()
-    if users_collection.find_one({"username": new_email}):
+    if await users_collection.find_one({"username": new_email}):
         raise HTTPException(status_code=400, detail="Email already taken")
-    result = users_collection.update_one(
+    result = await users_collection.update_one(
         {"_id": ObjectId(user_id)},
         {"$set": {"username": new_email}}
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
+    invalidate_principal(user_id)
     return {"message": "User renamed successfully"}
 
-@router.get("/user-count", include_in_schema=True)
-def get_user_count():
-    count = users_collection.count_documents({})
+@router.get("/user-count", response_model=UserCount, include_in_schema=True)
+async def get_user_count():
+    count = await users_collection.count_documents({})
     return {"total_users": count}
+
+@router.get("/stats", response_model=AdminStats)
+async def get_stats(admin_id: str = Depends(get_current_admin)):
+    return {
+        "key_cache": key_cache_stats(),
+        "principal_cache": principal_cache.stats(),
+        "hashing": hash_stats(),
+    }
@@ -1,41 +1,51 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from models import APIKeyIn
+from fastapi import APIRouter, HTTPException, Depends, status, Request, Response
+from models import APIKeyIn, APIKeyBatch, BatchCreateResult, APIKeyOut, APIKeySecret, APIKeyDeleted, ItemCreated
 from auth import get_current_user
+from utils.pagination import PageParams
+from utils.conditional import conditional_list
 from operations import (
     add_api_key as op_add_api_key,
     view_api_keys as op_view_api_keys,
     reveal_api_key as op_reveal_api_key,
     delete_api_key as op_delete_api_key,
+    add_items,
 )
 
 router = APIRouter(prefix="/api-keys", tags=["API Keys"])
 
-@router.post("/", status_code=status.HTTP_201_CREATED)
-def add_key(data: APIKeyIn, user_id: str = Depends(get_current_user)):
+@router.post("/", response_model=ItemCreated, status_code=status.HTTP_201_CREATED)
+async def add_key(data: APIKeyIn, user_id: str = Depends(get_current_user)):
     try:
-        inserted_id = op_add_api_key(data.service_name, data.api_key, data.description, user_id)
+        inserted_id = await op_add_api_key(data.service_name, data.api_key, data.description, user_id)
         return {"id": inserted_id, "message": "API Key added successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
-@router.get("/", status_code=status.HTTP_200_OK)
-def list_keys(user_id: str = Depends(get_current_user)):
+@router.post("/batch", response_model=BatchCreateResult, status_code=status.HTTP_200_OK)
+async def add_keys_batch(data: APIKeyBatch, user_id: str = Depends(get_current_user)):
     try:
-        return op_view_api_keys(user_id)
+        return await add_items(user_id, [("api_key", item.model_dump()) for item in data.items], data.ordered)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
-@router.get("/reveal/{key_id}", status_code=status.HTTP_200_OK)
-def reveal_key(key_id: str, user_id: str = Depends(get_current_user)):
-    result = op_reveal_api_key(key_id, user_id)
+@router.get("/", response_model=list[APIKeyOut], status_code=status.HTTP_200_OK)
+async def list_keys(request: Request, response: Response, page: PageParams = Depends(), user_id: str = Depends(get_current_user)):
+    try:
+        return await conditional_list(request, response, user_id, "api_key", op_view_api_keys, page)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+@router.get("/reveal/{key_id}", response_model=APIKeySecret, status_code=status.HTTP_200_OK)
+async def reveal_key(key_id: str, user_id: str = Depends(get_current_user)):
+    result = await op_reveal_api_key(key_id, user_id)
     if result:
         return result
     else:
         raise HTTPException(status_code=404, detail="API Key not found or access denied")
 
-@router.delete("/delete/{key_id}", status_code=status.HTTP_200_OK)
-def delete_key(key_id: str, user_id: str = Depends(get_current_user)):
-    result = op_delete_api_key(key_id, user_id)
+@router.delete("/delete/{key_id}", response_model=APIKeyDeleted, status_code=status.HTTP_200_OK)
+async def delete_key(key_id: str, user_id: str = Depends(get_current_user)):
+    result = await op_delete_api_key(key_id, user_id)
     if result is None:
         raise HTTPException(status_code=404, detail="API Key not found or access denied")
     elif result is False:
@@ -1,103 +1,133 @@
-from fastapi import APIRouter,HTTPException, Depends, Query
-from models import VerifyRequest, EmailRequest
+from fastapi import APIRouter,HTTPException, Depends, Query, Request
+from models import VerifyRequest, EmailRequest, UserLogin, MessageOut, LoginOut, PepperOut, TokenOut, SaltOut, UserOut
 from utils.otp import *
 from utils.email_utils import *
+from utils.outbox import enqueue_email
+from utils.rate_limit import enforce
 from fastapi.security import OAuth2PasswordRequestForm
-from auth import create_access_token,create_user,authenticate_user,get_current_user
+from auth import create_access_token,create_user,authenticate_user,verify_user_password,get_current_user,cache_principal,get_principal
 from starlette import status
 from db_config import db
-from bson import ObjectId
-import time
+from datetime import datetime, timedelta, timezone
 from pymongo import ReturnDocument
-
-pending_otps = {}  # email -> {"otp": ..., "expiry": ...}
+from indexes import OTP_TTL_SECONDS
+import asyncio
 
 users_collection=db["users"]
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
-@router.post("/register")
-def register(data: EmailRequest):
+@router.post("/register", response_model=MessageOut)
+async def register(data: EmailRequest, request: Request):
     email = data.email.strip().lower()
-    if users_collection.find_one({"username": email}):
+    await enforce(request, "register", email)
+    if await users_collection.find_one({"username": email}):
         raise HTTPException(400, "Email already registered")
 
     otp = generate_otp()
-    expiry = time.time() + 300  # 5 minutes from now
+    # TTL index on expires_at deletes the doc once it lapses
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=OTP_TTL_SECONDS)
 
     # Upsert OTP doc
-    db["pending_otps"].find_one_and_update(
+    await db["pending_otps"].find_one_and_update(
         {"email": email},
-        {"$set": {"otp": otp, "expiry": expiry}},
+        {"$set": {"otp": otp, "expires_at": expires_at}},
         upsert=True,
         return_document=ReturnDocument.AFTER
     )
 
-    send_otp_email(email, otp)
+    # Delivered by the outbox senders; the request does not wait on SMTP
+    await enqueue_email(email, OTP_SUBJECT, otp_body(otp))
     return {"message": "OTP sent"}
 
 
-@router.post("/verify-otp")
-def verify_otp(data: VerifyRequest):
+@router.post("/verify-otp", response_model=MessageOut)
+async def verify_otp(data: VerifyRequest, request: Request):
     email = data.email.strip().lower()
-    record = db["pending_otps"].find_one({"email": email})
+    await enforce(request, "verify-otp", email)
+    # The TTL monitor runs about once a minute, so still filter out lapsed OTPs here
+    record = await db["pending_otps"].find_one({
+        "email": email,
+        "expires_at": {"$gt": datetime.now(timezone.utc)}
+    })
 
     if not record:
-        raise HTTPException(400, "No OTP request found for this email")
+        raise HTTPException(400, "No valid OTP request found for this email")
     if record["otp"] != data.otp:
         raise HTTPException(400, "Invalid OTP")
-    if time.time() > record["expiry"]:
-        db["pending_otps"].delete_one({"email": email})
-        raise HTTPException(400, "OTP expired")
     
-    db["black"].find_one_and_update(
+    await db["black"].find_one_and_update(
         {"email": email},
         {"$set": {"pepper": data.pepper}},
         upsert=True
     )
-    create_user(email, data.password, data.salt)
-    db["pending_otps"].delete_one({"email": email})
+    await create_user(email, data.password, data.salt)
+    await db["pending_otps"].delete_one({"email": email})
     return {"message": "Registration successful"}
 
-@router.get("/pepper")
-def get_pepper(email: str = Query(...)):
+@router.get("/pepper", response_model=PepperOut)
+async def get_pepper(request: Request, email: str = Query(...)):
     email = email.strip().lower()
-    record = db["black"].find_one({"email": email})
+    await enforce(request, "pepper", email)
+    record = await db["black"].find_one({"email": email})
     if not record:
         raise HTTPException(404, "Pepper not found for this email")
     return {"pepper": record["pepper"]}
 
     
-@router.post("/token")
-def user_login(form_data: OAuth2PasswordRequestForm = Depends()):
-    db_user=authenticate_user(form_data.username,form_data.password)
+@router.post("/token", response_model=TokenOut)
+async def user_login(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
+    await enforce(request, "token", form_data.username)
+    db_user=await authenticate_user(form_data.username,form_data.password)
     if not db_user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     token=create_access_token({"user_id":str(db_user["_id"])})
+    cache_principal(db_user)
     return {"access_token": token, "token_type": "bearer"}
 
-@router.get("/salt")
-def get_salt(username:str=Query(...),user_id:str=Depends(get_current_user)):
+@router.post("/login", response_model=LoginOut)
+async def login(data: UserLogin, request: Request):
+    # /auth/token plus /auth/salt and /auth/me in one round trip; the user and
+    # pepper records are read together instead of one request after another
+    email = data.username.strip().lower()
+    await enforce(request, "token", email)
+    user, pepper = await asyncio.gather(
+        users_collection.find_one({"username": email}),
+        db["black"].find_one({"email": email}, projection={"pepper": 1}),
+    )
+    if not user or not await verify_user_password(user, data.password):
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    principal = cache_principal(user)
+    return {
+        "access_token": create_access_token({"user_id": principal["id"]}),
+        "token_type": "bearer",
+        "salt": principal["salt"],
+        "pepper": pepper["pepper"] if pepper else None,
+        "is_admin": principal["is_admin"],
+    }
+
+@router.get("/salt", response_model=SaltOut)
+async def get_salt(username:str=Query(...),user_id:str=Depends(get_current_user)):
     username = username.strip().lower()
-    user = users_collection.find_one({"_id": ObjectId(user_id)})
+    user = await get_principal(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    if user["username"] != username:
+    if user["email"] != username:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You can only access your own salt."
         )
     return {"salt": user["salt"]}
 
-@router.get("/me")
-def get_user_info(user_id: str = Depends(get_current_user)):
-    user = users_collection.find_one({"_id": ObjectId(user_id)})
+@router.get("/me", response_model=UserOut)
+async def get_user_info(user_id: str = Depends(get_current_user)):
+    user = await get_principal(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return {
-        "id": str(user["_id"]),
-        "email": user["username"],
-        "is_admin": user.get("is_admin", False)
+        "id": user["id"],
+        "email": user["email"],
+        "is_admin": user["is_admin"]
     }
 
     
\ No newline at end of file
@@ -1,20 +1,23 @@
-from fastapi import APIRouter, HTTPException, Depends
-from models import CredentialIn
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from models import CredentialIn, CredentialBatch, BatchCreateResult, CredentialOut, CredentialSecret, CredentialDeleted, ItemCreated
 from auth import get_current_user
+from utils.pagination import PageParams
+from utils.conditional import conditional_list
 from starlette import status
 from operations import (
     add_credential as op_add_credential,
     view_credentials as op_view_credentials,
     reveal_password as op_reveal_password,
-    delete_credential as op_delete_credential
+    delete_credential as op_delete_credential,
+    add_items,
 )
 
 router = APIRouter(prefix="/credentials", tags=["Credentials"])
 
-@router.post("/", status_code=status.HTTP_201_CREATED)
-def add_credential(cred: CredentialIn, user_id: str = Depends(get_current_user)):
+@router.post("/", response_model=ItemCreated, status_code=status.HTTP_201_CREATED)
+async def add_credential(cred: CredentialIn, user_id: str = Depends(get_current_user)):
     try:
-        inserted_id = op_add_credential(cred.site, cred.username, cred.password, user_id)
+        inserted_id = await op_add_credential(cred.site, cred.username, cred.password, user_id)
         return {
             "id": inserted_id,
             "message": "Credential added successfully"
@@ -22,24 +25,31 @@ def add_credential(cred: CredentialIn, user_id: str = Depends(get_current_user))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
-@router.get("/", status_code=status.HTTP_200_OK)
-def view(user_id: str = Depends(get_current_user)):
+@router.post("/batch", response_model=BatchCreateResult, status_code=status.HTTP_200_OK)
+async def add_credentials_batch(data: CredentialBatch, user_id: str = Depends(get_current_user)):
     try:
-        return op_view_credentials(user_id)
+        return await add_items(user_id, [("credential", item.model_dump()) for item in data.items], data.ordered)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
-@router.get("/reveal/{cred_id}", status_code=status.HTTP_200_OK)
-def reveal(cred_id: str, user_id: str = Depends(get_current_user)):
-    result = op_reveal_password(cred_id, user_id)
+@router.get("/", response_model=list[CredentialOut], status_code=status.HTTP_200_OK)
+async def view(request: Request, response: Response, page: PageParams = Depends(), user_id: str = Depends(get_current_user)):
+    try:
+        return await conditional_list(request, response, user_id, "credential", op_view_credentials, page)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+@router.get("/reveal/{cred_id}", response_model=CredentialSecret, status_code=status.HTTP_200_OK)
+async def reveal(cred_id: str, user_id: str = Depends(get_current_user)):
+    result = await op_reveal_password(cred_id, user_id)
     if result:
         return result
     else:
         raise HTTPException(status_code=404, detail="Credential not found or access denied")
 
-@router.delete("/delete/{cred_id}", status_code=status.HTTP_200_OK)
-def delete_cred(cred_id: str, user_id: str = Depends(get_current_user)):
-    result = op_delete_credential(cred_id, user_id)
+@router.delete("/delete/{cred_id}", response_model=CredentialDeleted, status_code=status.HTTP_200_OK)
+async def delete_cred(cred_id: str, user_id: str = Depends(get_current_user)):
+    result = await op_delete_credential(cred_id, user_id)
     if result is None:
         raise HTTPException(status_code=404, detail="Credential not found or access denied")
     elif result is False:
@@ -0,0 +1,43 @@
+import asyncio
+import os
+import time
+from fastapi import APIRouter, Request
+from utils.responses import VaultJSONResponse
+import db_config
+
+READY_TIMEOUT = float(os.getenv("READY_TIMEOUT", "2"))
+
+router = APIRouter(tags=["Health"])
+
+
+async def mongo_status():
+    try:
+        latency = await asyncio.wait_for(db_config.ping(), READY_TIMEOUT)
+    except Exception as e:
+        return {"ok": False, "error": str(e) or type(e).__name__}
+    return {"ok": True, "latency_ms": latency}
+
+
+@router.get("/healthz", include_in_schema=False)
+async def healthz(request: Request):
+    # Liveness: the event loop answers. Mongo is reported but never fails the check,
+    # so an orchestrator does not restart workers over a database outage.
+    return {
+        "status": "ok",
+        "uptime_seconds": round(time.monotonic() - getattr(request.app.state, "started_at", time.monotonic()), 1),
+        "pid": os.getpid(),
+        "lease": request.app.state.lease.status() if hasattr(request.app.state, "lease") else None,
+        "mongo": await mongo_status(),
+    }
+
+
+@router.get("/readyz", include_in_schema=False)
+async def readyz(request: Request):
+    # Readiness: startup finished and Mongo answers a ping within READY_TIMEOUT
+    mongo = await mongo_status()
+    started = getattr(request.app.state, "ready", False)
+    ready = started and mongo["ok"]
+    return VaultJSONResponse(
+        {"status": "ready" if ready else "not ready", "started": started, "mongo": mongo},
+        status_code=200 if ready else 503,
+    )
@@ -1,36 +1,45 @@
-from fastapi import APIRouter, HTTPException, Depends
-from models import NoteIn
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from models import NoteIn, NoteBatch, BatchCreateResult, NoteOut, NoteSecret, NoteDeleted, ItemCreated
 from auth import get_current_user
+from utils.pagination import PageParams
+from utils.conditional import conditional_list
 from starlette import status
-from operations import add_note, view_notes, reveal_note, delete_note
+from operations import add_note, add_items, view_notes, reveal_note, delete_note
 
 router = APIRouter(prefix="/notes", tags=["Encrypted Notes"])
 
-@router.post("/", status_code=status.HTTP_201_CREATED)
-def add_note_route(note: NoteIn, user_id: str = Depends(get_current_user)):
+@router.post("/", response_model=ItemCreated, status_code=status.HTTP_201_CREATED)
+async def add_note_route(note: NoteIn, user_id: str = Depends(get_current_user)):
     try:
-        inserted_id = add_note(note.title, note.content, user_id)
+        inserted_id = await add_note(note.title, note.content, user_id)
         return {"id": inserted_id, "message": "Note added successfully"}
     except Exception as e:
         raise HTTPException(500, f"Error: {str(e)}")
 
-@router.get("/", status_code=status.HTTP_200_OK)
-def view_notes_route(user_id: str = Depends(get_current_user)):
+@router.post("/batch", response_model=BatchCreateResult, status_code=status.HTTP_200_OK)
+async def add_notes_batch(data: NoteBatch, user_id: str = Depends(get_current_user)):
     try:
-        return view_notes(user_id)
+        return await add_items(user_id, [("note", item.model_dump()) for item in data.items], data.ordered)
     except Exception as e:
         raise HTTPException(500, f"Error: {str(e)}")
 
-@router.get("/{note_id}", status_code=status.HTTP_200_OK)
-def reveal_note_route(note_id: str, user_id: str = Depends(get_current_user)):
-    result = reveal_note(note_id, user_id)
+@router.get("/", response_model=list[NoteOut], status_code=status.HTTP_200_OK)
+async def view_notes_route(request: Request, response: Response, page: PageParams = Depends(), user_id: str = Depends(get_current_user)):
+    try:
+        return await conditional_list(request, response, user_id, "note", view_notes, page)
+    except Exception as e:
+        raise HTTPException(500, f"Error: {str(e)}")
+
+@router.get("/{note_id}", response_model=NoteSecret, status_code=status.HTTP_200_OK)
+async def reveal_note_route(note_id: str, user_id: str = Depends(get_current_user)):
+    result = await reveal_note(note_id, user_id)
     if result:
         return result
     raise HTTPException(404, "Note not found or access denied")
 
-@router.delete("/{note_id}", status_code=status.HTTP_200_OK)
-def delete_note_route(note_id: str, user_id: str = Depends(get_current_user)):
-    result = delete_note(note_id, user_id)
+@router.delete("/{note_id}", response_model=NoteDeleted, status_code=status.HTTP_200_OK)
+async def delete_note_route(note_id: str, user_id: str = Depends(get_current_user)):
+    result = await delete_note(note_id, user_id)
     if result is None:
         raise HTTPException(404, "Note not found or access denied")
     elif result is False:
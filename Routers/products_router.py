@@ -1,20 +1,23 @@
-from fastapi import APIRouter, HTTPException, Depends
-from models import ProductKeyIn
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from models import ProductKeyIn, ProductKeyBatch, BatchCreateResult, ProductKeyOut, ProductKeySecret, ProductKeyDeleted, ItemCreated
 from auth import get_current_user
+from utils.pagination import PageParams
+from utils.conditional import conditional_list
 from starlette import status
 from operations import (
     add_product_key,
     view_product_keys,
     reveal_license_key,
-    delete_product_key
+    delete_product_key,
+    add_items,
 )
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
-@router.post("/",status_code=status.HTTP_201_CREATED)
-def add_products(product:ProductKeyIn,user_id:str=Depends(get_current_user)):
+@router.post("/",response_model=ItemCreated,status_code=status.HTTP_201_CREATED)
+async def add_products(product:ProductKeyIn,user_id:str=Depends(get_current_user)):
     try:
-        inserted_id=add_product_key(product.product_name,product.license_key,product.description,user_id)
+        inserted_id=await add_product_key(product.product_name,product.license_key,product.description,user_id)
         return {
             "id": inserted_id,
             "message": "Product key added successfully"
@@ -22,24 +25,31 @@ def add_products(product:ProductKeyIn,user_id:str=Depends(get_current_user)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}") 
     
-@router.get("/",status_code=status.HTTP_200_OK)
-def view(user_id:str = Depends(get_current_user)):
+@router.post("/batch", response_model=BatchCreateResult, status_code=status.HTTP_200_OK)
+async def add_products_batch(data: ProductKeyBatch, user_id: str = Depends(get_current_user)):
     try:
-        return view_product_keys(user_id)
+        return await add_items(user_id, [("product", item.model_dump()) for item in data.items], data.ordered)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+@router.get("/",response_model=list[ProductKeyOut],status_code=status.HTTP_200_OK)
+async def view(request: Request, response: Response, page: PageParams = Depends(), user_id:str = Depends(get_current_user)):
+    try:
+        return await conditional_list(request, response, user_id, "product", view_product_keys, page)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
     
-@router.get("/reveal/{product_id}",status_code=status.HTTP_200_OK)
-def reveal(product_id:str,user_id:str=Depends(get_current_user)):
-    result = reveal_license_key(product_id,user_id)
+@router.get("/reveal/{product_id}",response_model=ProductKeySecret,status_code=status.HTTP_200_OK)
+async def reveal(product_id:str,user_id:str=Depends(get_current_user)):
+    result = await reveal_license_key(product_id,user_id)
     if result:
         return result
     else:
         raise HTTPException(status_code=404, detail="Credential not found or access denied")
     
-@router.delete("/delete/{product_id}", status_code=status.HTTP_200_OK)
-def delete_key(product_id: str, user_id: str = Depends(get_current_user)):
-    result = delete_product_key(product_id, user_id)
+@router.delete("/delete/{product_id}", response_model=ProductKeyDeleted, status_code=status.HTTP_200_OK)
+async def delete_key(product_id: str, user_id: str = Depends(get_current_user)):
+    result = await delete_product_key(product_id, user_id)
     if result is None:
         raise HTTPException(status_code=404, detail="Product not found or access denied")
     elif result is False:
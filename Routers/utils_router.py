@@ -1,13 +1,22 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from strength_test import *
-import secrets
+from models import PasswordBatchRequest, PasswordStrength, PasswordBatchOut, GeneratedPassword, GeneratedPasswords
+from password_generator import DEFAULT_ALPHABET, DEFAULT_EXCLUDE, build_alphabet, generate_passwords
+from utils.rate_limit import enforce
+from utils.responses import dumps
+
+STREAM_THRESHOLD = 1000
+# At most 10,000 x 256 characters, about 2.6 MB of response per call
+GENERATE_MAX_COUNT = 10_000
+GENERATE_MAX_LENGTH = 256
 
 router = APIRouter(
     prefix="/utils",
     tags={"utils"}
 )
 
-@router.post("/password-strength")
+@router.post("/password-strength", response_model=PasswordStrength)
 def password_strength(password: str):
     entropy_bits, charset_size= calculate_entropy(password)
     times=estimate_crack_times(entropy_bits)
@@ -25,12 +34,50 @@ def password_strength(password: str):
         },
         "verdict":get_verdict(entropy_bits)
     }
+
+@router.post("/password-strength/batch", response_model=PasswordBatchOut)
+def password_strength_batch(data: PasswordBatchRequest):
+    # Results are returned in request order; passwords are not echoed back
+    return {"results": score_passwords(data.passwords, data.estimator)}
     
-@router.get("/generate-strong-password")
+@router.get("/generate-strong-password", response_model=GeneratedPassword)
 def generate_strong_password():
     length = 64 
-    charset = string.ascii_letters + string.digits + string.punctuation
-    charset = charset.replace('"', '').replace("'", '').replace('\\', '').replace('`', '')
+    password = next(generate_passwords(1, length, DEFAULT_ALPHABET))
+    return {"password": password}
+
+@router.get("/generate-passwords", response_model=GeneratedPasswords)
+async def generate_bulk_passwords(
+    request: Request,
+    count: int = Query(10, ge=1, le=GENERATE_MAX_COUNT),
+    length: int = Query(32, ge=4, le=GENERATE_MAX_LENGTH),
+    lower: bool = True,
+    upper: bool = True,
+    digits: bool = True,
+    symbols: bool = True,
+    exclude: str = Query(DEFAULT_EXCLUDE, max_length=128),
+):
+    await enforce(request, "generate")
+    classes = tuple(name for name, on in (("lower", lower), ("upper", upper), ("digits", digits), ("symbols", symbols)) if on)
+    alphabet = build_alphabet(classes, exclude)
+    if len(alphabet) < 2:
+        raise HTTPException(status_code=400, detail="Character set is empty after exclusions")
+    passwords = generate_passwords(count, length, alphabet)
+    if count <= STREAM_THRESHOLD:
+        # At most 256k characters, a few milliseconds; larger requests stream from the threadpool
+        return {"passwords": list(passwords)}
+
+    def body():
+        # Same JSON shape as the small response, emitted a thousand passwords at a time
+        yield b'{"passwords": ['
+        chunk = []
+        for i, password in enumerate(passwords):
+            chunk.append(dumps(password))
+            if len(chunk) == STREAM_THRESHOLD:
+                yield (b"," if i >= STREAM_THRESHOLD else b"") + b",".join(chunk)
+                chunk = []
+        if chunk:
+            yield (b"," if count > len(chunk) else b"") + b",".join(chunk)
+        yield b"]}"
 
-    password = ''.join(secrets.choice(charset) for _ in range(length))
-    return {"password": password}
\ No newline at end of file
+    return StreamingResponse(body(), media_type="application/json")
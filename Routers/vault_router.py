@@ -0,0 +1,204 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from models import (
+    VaultSnapshot, BulkRevealRequest, BulkRevealOut, ImportResult, AuditReport, SearchResults,
+    RotationStarted, RotationJobOut, VaultBatch, BatchCreateResult,
+    CredentialIn, ProductKeyIn, NoteIn, APIKeyIn,
+)
+from auth import get_current_user
+from starlette import status
+from operations import (
+    view_credentials,
+    view_product_keys,
+    view_notes,
+    view_api_keys,
+    reveal_many,
+    export_items,
+    import_items,
+    add_items,
+    get_versions,
+)
+from utils.conditional import make_etag, etag_matches, not_modified
+from audit import run_audit
+from search import search_vault
+from rotation import start_rotation, get_rotation, RotationInProgress
+from utils.responses import dumps
+import asyncio
+import json
+import os
+
+IMPORT_MAX_LINE_BYTES = int(os.getenv("IMPORT_MAX_LINE_BYTES", str(1024 * 1024)))
+
+IMPORT_MODELS = {
+    "credential": CredentialIn,
+    "product": ProductKeyIn,
+    "note": NoteIn,
+    "api_key": APIKeyIn,
+}
+
+router = APIRouter(prefix="/vault", tags=["Vault"])
+
+@router.get("/", response_model=VaultSnapshot, status_code=status.HTTP_200_OK)
+async def snapshot(request: Request, response: Response, user_id: str = Depends(get_current_user)):
+    try:
+        versions = await get_versions(user_id)
+        etag = make_etag(user_id, "snapshot", *sorted(versions.items()))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        credentials, products, notes, api_keys = await asyncio.gather(
+            view_credentials(user_id),
+            view_product_keys(user_id),
+            view_notes(user_id),
+            view_api_keys(user_id),
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    response.headers["ETag"] = etag
+    # Each view returns (items, next_cursor); the snapshot is unpaginated
+    return {
+        "credentials": credentials[0],
+        "products": products[0],
+        "notes": notes[0],
+        "api_keys": api_keys[0],
+    }
+
+@router.post("/batch", response_model=BatchCreateResult, status_code=status.HTTP_200_OK)
+async def batch_create(data: VaultBatch, user_id: str = Depends(get_current_user)):
+    # Mixed item types in one request; results keep the request order
+    try:
+        return await add_items(user_id, [(item.type, item.model_dump(exclude={"type"})) for item in data.items], data.ordered)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+@router.post("/reveal", response_model=BulkRevealOut, response_model_exclude_unset=True, status_code=status.HTTP_200_OK)
+async def bulk_reveal(data: BulkRevealRequest, user_id: str = Depends(get_current_user)):
+    try:
+        items = await reveal_many([(i.type, i.id) for i in data.items], user_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    return {"items": items}
+
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_vault(
+    mode: str = Query("decrypted", pattern="^(decrypted|encrypted)$"),
+    user_id: str = Depends(get_current_user),
+):
+    async def lines():
+        async for record in export_items(user_id, decrypt=(mode == "decrypted")):
+            yield dumps(record) + b"\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="vault-{mode}.ndjson"'},
+    )
+
+@router.post("/import", response_model=ImportResult, status_code=status.HTTP_200_OK)
+async def import_vault(
+    request: Request,
+    mode: str = Query("decrypted", pattern="^(decrypted|encrypted)$"),
+    user_id: str = Depends(get_current_user),
+):
+    parse_errors = []
+
+    async def records():
+        # Split the body on newlines as it arrives instead of reading it all first. Only the new
+        # chunk is searched; a partial line is kept as pieces until its newline shows up, and one
+        # longer than IMPORT_MAX_LINE_BYTES is dropped as it streams in and reported as an error.
+        pieces, size, too_long = [], 0, False
+        line_no = 0
+        async for chunk in request.stream():
+            start = 0
+            while (end := chunk.find(b"\n", start)) != -1:
+                line_no += 1
+                if too_long or size + end - start > IMPORT_MAX_LINE_BYTES:
+                    parse_errors.append({"line": line_no, "error": f"Line exceeds {IMPORT_MAX_LINE_BYTES} bytes"})
+                else:
+                    pieces.append(chunk[start:end])
+                    parsed = parse_line(b"".join(pieces), line_no)
+                    if parsed:
+                        yield parsed
+                pieces, size, too_long = [], 0, False
+                start = end + 1
+            if start < len(chunk) and not too_long:
+                size += len(chunk) - start
+                if size > IMPORT_MAX_LINE_BYTES:
+                    pieces, too_long = [], True
+                else:
+                    pieces.append(chunk[start:])
+        if too_long:
+            parse_errors.append({"line": line_no + 1, "error": f"Line exceeds {IMPORT_MAX_LINE_BYTES} bytes"})
+        elif pieces:
+            parsed = parse_line(b"".join(pieces), line_no + 1)
+            if parsed:
+                yield parsed
+
+    def parse_line(line, line_no):
+        if not line.strip():
+            return None
+        try:
+            record = json.loads(line)
+            item_type = record.pop("type", None)
+            model = IMPORT_MODELS.get(item_type)
+            if model is None:
+                raise ValueError("Unknown item type")
+            record.pop("id", None)
+            fields = model.model_validate(record).model_dump()
+        except (ValueError, AttributeError, ValidationError) as e:
+            parse_errors.append({"line": line_no, "error": str(e).splitlines()[0]})
+            return None
+        return line_no, item_type, fields
+
+    try:
+        result = await import_items(user_id, records(), encrypted=(mode == "encrypted"))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    result["errors"] = sorted(parse_errors + result["errors"], key=lambda e: e["line"])
+    return result
+
+@router.get("/audit", response_model=AuditReport, status_code=status.HTTP_200_OK)
+async def audit_vault(
+    estimator: str = Query("pattern", pattern="^(charset|pattern)$"),
+    user_id: str = Depends(get_current_user),
+):
+    try:
+        return await run_audit(user_id, estimator)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+@router.get("/search", response_model=SearchResults, response_model_exclude_unset=True, status_code=status.HTTP_200_OK)
+async def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    type: list[str] | None = Query(None, description="credential, product, note or api_key"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=5000),
+    user_id: str = Depends(get_current_user),
+):
+    if not q.strip():
+        raise HTTPException(status_code=422, detail="Search query must not be blank")
+    if type and not set(type) <= set(IMPORT_MODELS):
+        raise HTTPException(status_code=400, detail="Unknown item type")
+    try:
+        return await search_vault(user_id, q, type, limit, offset)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+@router.post("/rotate-key", response_model=RotationStarted, status_code=status.HTTP_202_ACCEPTED)
+async def rotate_key(user_id: str = Depends(get_current_user)):
+    try:
+        job_id = await start_rotation(user_id)
+    except RotationInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    if job_id is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"job_id": job_id}
+
+@router.get("/rotate-key/{job_id}", response_model=RotationJobOut, status_code=status.HTTP_200_OK)
+async def rotation_status(job_id: str, user_id: str = Depends(get_current_user)):
+    job = await get_rotation(job_id, user_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Rotation job not found")
+    return job
@@ -0,0 +1,87 @@
+import hashlib
+import hmac
+import os
+from pymongo import ReplaceOne
+from bson import ObjectId
+from db_config import db, vault_collection
+from operations import get_user_decryptor
+from strength_test import score_password
+
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+WEAK_VERDICTS = ("Very Weak", "Weak")
+
+# One row per credential and estimator, keyed by (credential_id, estimator). Credentials
+# are never edited in place, so a credential that already has a row needs no re-scoring.
+audit_collection = db["password_audit"]
+
+
+def _fingerprint_key(user_id):
+    # Per-user key from the server secret: equal passwords match within a vault
+    # only, and the stored fingerprints are useless without SECRET.
+    return hmac.new(str(os.getenv("SECRET")).encode(), f"audit:{user_id}".encode(), hashlib.sha256).digest()
+
+
+async def _score_batch(user_id, ids, key, fingerprint_key, estimator):
+    ops = []
+    cursor = vault_collection.find(
+        {"_id": {"$in": ids}, "user_id": ObjectId(user_id)},
+        projection={"password": 1, "site": 1, "username": 1},
+    )
+    async for cred in cursor:
+        password = await key.decrypt(cred["password"])
+        score = score_password(password, estimator)
+        ops.append(ReplaceOne({"credential_id": cred["_id"], "estimator": estimator}, {
+            "credential_id": cred["_id"],
+            "user_id": ObjectId(user_id),
+            "site": cred["site"],
+            "username": cred["username"],
+            "fingerprint": hmac.new(fingerprint_key, password.encode(), hashlib.sha256).hexdigest(),
+            "entropy_bits": score["entropy_bits"],
+            "verdict": score["verdict"],
+            "estimator": estimator,
+        }, upsert=True))
+    if ops:
+        await audit_collection.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+async def run_audit(user_id, estimator="pattern"):
+    owner = ObjectId(user_id)
+    # Covered by the user_id+_id index, so this never touches ciphertext
+    current = {c["_id"] async for c in vault_collection.find({"user_id": owner}, projection={"_id": 1})}
+    # Rows written before they carried credential_id read as None and are dropped as stale
+    cached = {
+        row.get("credential_id") async for row in audit_collection.find(
+            {"user_id": owner, "estimator": estimator}, projection={"credential_id": 1}
+        )
+    }
+
+    stale = list(cached - current)
+    if stale:
+        await audit_collection.delete_many({"user_id": owner, "estimator": estimator, "credential_id": {"$in": stale}})
+
+    new = list(current - cached)
+    rescored = 0
+    if new:
+        key = await get_user_decryptor(user_id)
+        fingerprint_key = _fingerprint_key(user_id)
+        for start in range(0, len(new), AUDIT_BATCH_SIZE):
+            rescored += await _score_batch(user_id, new[start:start + AUDIT_BATCH_SIZE], key, fingerprint_key, estimator)
+
+    summary = {}
+    weak = []
+    by_fingerprint = {}
+    async for row in audit_collection.find({"user_id": owner, "estimator": estimator}):
+        summary[row["verdict"]] = summary.get(row["verdict"], 0) + 1
+        entry = {"id": str(row["credential_id"]), "site": row["site"], "username": row["username"]}
+        if row["verdict"] in WEAK_VERDICTS:
+            weak.append({**entry, "verdict": row["verdict"], "entropy_bits": row["entropy_bits"]})
+        by_fingerprint.setdefault(row["fingerprint"], []).append(entry)
+
+    return {
+        "total": len(current),
+        "rescored": rescored,
+        "summary": summary,
+        "weak": weak,
+        "reused": [group for group in by_fingerprint.values() if len(group) > 1],
+    }
@@ -3,11 +3,12 @@ from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime, timedelta
 from cryptography.fernet import Fernet
 from jose import JWTError, jwt
-import bcrypt
 from db_config import db
 import os
 from dotenv import load_dotenv
 from bson import ObjectId
+from hashing import hash_password, check_password, HashQueueFull, HASH_RETRY_AFTER
+from cache import TTLCache
 
 
 oauth2_scheme=OAuth2PasswordBearer(tokenUrl="auth/token")
@@ -18,26 +19,53 @@ ACCESS_TOKEN_EXPIRE_MINUTES=30
 
 users_collection=db["users"]
 
-def create_user(username, password, salt, is_admin=False):
+# user_id -> parsed identity; short TTL bounds staleness across workers
+principal_cache = TTLCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", "60")),
+    name="principal",
+)
+
+def raise_hash_busy():
+    # Shed load fast instead of letting bcrypt latency pile up behind a full queue
+    raise HTTPException(
+        status_code=503,
+        detail="Server busy, try again shortly",
+        headers={"Retry-After": str(HASH_RETRY_AFTER)},
+    )
+
+async def create_user(username, password, salt, is_admin=False):
     email = username.strip().lower()
-    existing_user = users_collection.find_one({"username": email})
+    existing_user = await users_collection.find_one({"username": email})
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt())
+    try:
+        hashed = await hash_password(password)
+    except HashQueueFull:
+        raise_hash_busy()
     fernet_key = Fernet.generate_key()
     user = {
         "username": email,
         "password": hashed,
         "key": fernet_key,
         "salt": salt,
-        "is_admin": is_admin
+        "is_admin": is_admin,
+        "search_indexed": True  # nothing to backfill for a brand-new vault
     }
-    users_collection.insert_one(user)
+    await users_collection.insert_one(user)
     
-def authenticate_user(username,password):
+async def verify_user_password(user, password):
+    try:
+        return await check_password(password, user["password"])
+    except HashQueueFull:
+        raise_hash_busy()
+
+async def authenticate_user(username,password):
     email=username.strip().lower()
-    user=users_collection.find_one({"username":email})
-    if not user or not bcrypt.checkpw(password.encode(),user["password"]):
+    user=await users_collection.find_one({"username":email})
+    if not user:
+        return None
+    if not await verify_user_password(user, password):
         return None
     return user
 
@@ -47,7 +75,7 @@ def create_access_token(data:dict):
     to_encode.update({"exp":expire})
     return jwt.encode(to_encode,SECRET_KEY,algorithm=ALGORITHM)
 
-def get_current_user(token:str=Depends(oauth2_scheme)):
+async def get_current_user(token:str=Depends(oauth2_scheme)):
     try:
         payload=jwt.decode(token,SECRET_KEY,algorithms=[ALGORITHM])
         user_id=payload.get("user_id")
@@ -57,9 +85,34 @@ def get_current_user(token:str=Depends(oauth2_scheme)):
     except JWTError:
         raise HTTPException(status_code=401,detail="Invalid Token")
         
-def get_current_admin(user_id: str = Depends(get_current_user)):
-    user = users_collection.find_one({"_id": ObjectId(user_id)})
-    if not user or not user.get("is_admin"):
+def cache_principal(user):
+    principal = {
+        "id": str(user["_id"]),
+        "email": user["username"],
+        "is_admin": user.get("is_admin", False),
+        "salt": user.get("salt"),
+    }
+    principal_cache.set(principal["id"], principal)
+    return principal
+
+async def get_principal(user_id):
+    principal = principal_cache.get(str(user_id))
+    if principal is None:
+        user = await users_collection.find_one(
+            {"_id": ObjectId(user_id)},
+            projection={"username": 1, "is_admin": 1, "salt": 1}
+        )
+        if not user:
+            return None
+        principal = cache_principal(user)
+    return principal
+
+def invalidate_principal(user_id):
+    principal_cache.pop(str(user_id))
+
+async def get_current_admin(user_id: str = Depends(get_current_user)):
+    user = await get_principal(user_id)
+    if not user or not user["is_admin"]:
         raise HTTPException(status_code=403, detail="Admin access required")
     return user_id
 
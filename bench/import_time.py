@@ -0,0 +1,75 @@
+"""Cold import time of `main`, checked against a budget.
+
+    python bench/import_time.py --budget-ms 1200
+    python bench/import_time.py --module operations --top 20
+
+Each run is a fresh interpreter under `python -X importtime`; the fastest run is
+reported, since slower ones mostly measure a busy machine. Exits 1 over budget.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "1200")))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest direct imports to list")
+    parser.add_argument("--json", action="store_true")
+    return parser.parse_args()
+
+
+def measure(module):
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(proc.stderr)
+    packages = {}
+    total = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.rstrip()
+        # Nesting shows as two extra spaces per level; depth 1 is what `module` imports directly
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            packages[name.strip()] = int(cumulative) / 1000
+        elif depth == 0 and name.strip() == module:
+            total = int(cumulative) / 1000
+    return total, packages
+
+
+def main():
+    args = parse_args()
+    runs = [measure(args.module) for _ in range(args.runs)]
+    total, packages = min(runs, key=lambda run: run[0])
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]
+    report = {
+        "module": args.module,
+        "import_ms": round(total, 1),
+        "budget_ms": args.budget_ms,
+        "within_budget": total <= args.budget_ms,
+        "runs_ms": [round(run[0], 1) for run in runs],
+        "slowest": {name: round(ms, 1) for name, ms in slowest},
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import {args.module}: {report['import_ms']} ms (budget {args.budget_ms} ms, runs {report['runs_ms']})")
+        for name, ms in report["slowest"].items():
+            print(f"  {name:30} {ms:>8} ms")
+    sys.exit(0 if report["within_budget"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Drive the real FastAPI app with a mixed workload and report per-route latency.
+
+    python bench/load_test.py --in-memory --users 5 --duration 20
+    MONGO_URI=mongodb://localhost:27017 python bench/load_test.py --users 20 --credentials 5000
+
+--in-memory swaps the Mongo driver for mongomock-motor (pip install mongomock-motor)
+so the suite runs without a mongod; numbers from it are only useful for comparing
+code paths, not for capacity planning.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# item type -> (list/add url, reveal url, delete url, payload factory for adds)
+ITEM_ROUTES = {
+    "credential": ("/credentials/", "/credentials/reveal/{id}", "/credentials/delete/{id}",
+                   lambda: {"site": "bench.example", "username": "bench", "password": "hunter2"}),
+    "product": ("/products/", "/products/reveal/{id}", "/products/delete/{id}",
+                lambda: {"product_name": "Bench", "license_key": "AAAA-BBBB-CCCC", "description": "bench"}),
+    "note": ("/notes/", "/notes/{id}", "/notes/{id}",
+             lambda: {"title": "bench", "content": "x" * 256}),
+    "api_key": ("/api-keys/", "/api-keys/reveal/{id}", "/api-keys/delete/{id}",
+                lambda: {"service_name": "Bench", "api_key": "sk-bench", "description": "bench"}),
+}
+
+DEFAULT_MIX = {"login": 2, "list": 30, "snapshot": 8, "reveal": 40, "add": 10, "delete": 10}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--in-memory", action="store_true", help="use mongomock-motor instead of MONGO_URI")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--credentials", type=int, default=200)
+    parser.add_argument("--products", type=int, default=20)
+    parser.add_argument("--notes", type=int, default=20)
+    parser.add_argument("--api-keys", type=int, default=20)
+    parser.add_argument("--note-size", type=int, default=512)
+    parser.add_argument("--concurrency", type=int, default=20, help="virtual clients in flight")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds to run the workload")
+    parser.add_argument("--mix", type=json.loads, default=DEFAULT_MIX, help='JSON weights, e.g. \'{"reveal": 80, "list": 20}\'')
+    parser.add_argument("--seed", type=int, default=None, help="random seed for a repeatable run")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--keep", action="store_true", help="leave the seeded bench users in place")
+    return parser.parse_args()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, route, seconds, ok):
+        self.samples[route].append(seconds)
+        if not ok:
+            self.errors[route] += 1
+
+    def report(self, elapsed):
+        rows = {}
+        for route, values in sorted(self.samples.items()):
+            values.sort()
+            rows[route] = {
+                "count": len(values),
+                "errors": self.errors[route],
+                "rps": round(len(values) / elapsed, 1),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+            }
+        total = sum(len(v) for v in self.samples.values())
+        return {"elapsed_s": round(elapsed, 2), "requests": total, "rps": round(total / elapsed, 1), "routes": rows}
+
+
+async def run(args):
+    import httpx
+    from main import app
+    import hashing
+    from indexes import ensure_indexes
+    from seed import seed_user, clear_bench_users, BENCH_PASSWORD
+
+    await ensure_indexes()
+    await clear_bench_users()
+    accounts = []
+    for i in range(args.users):
+        email, _ = await seed_user(i, args.credentials, args.products, args.notes, args.api_keys, args.note_size)
+        accounts.append(email)
+    print(f"Seeded {args.users} users x ({args.credentials} credentials, {args.products} products, "
+          f"{args.notes} notes, {args.api_keys} api keys)", file=sys.stderr)
+
+    recorder = Recorder()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def call(route, method, url, **kwargs):
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            recorder.add(route, time.perf_counter() - start, response.status_code < 400)
+            return response
+
+        async def login(email):
+            response = await call("POST /auth/token", "POST", "/auth/token",
+                                  data={"username": email, "password": BENCH_PASSWORD})
+            if response.status_code >= 400:
+                return None  # e.g. 503 from bcrypt admission control
+            return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        sessions = []
+        for email in accounts:
+            headers = await login(email)
+            if headers is None:
+                raise SystemExit(f"Setup login failed for {email}; check RATE_LIMITS and the bcrypt pool "
+                                 f"(HASH_WORKERS, HASH_QUEUE_SIZE)")
+            ids = {}
+            for item_type, (list_url, *_rest) in ITEM_ROUTES.items():
+                response = await client.get(list_url, headers=headers)
+                ids[item_type] = [item["id"] for item in response.json()]
+            sessions.append({"email": email, "headers": headers, "ids": ids, "added": defaultdict(list)})
+
+        ops, weights = zip(*args.mix.items())
+        deadline = time.perf_counter() + args.duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                session = random.choice(sessions)
+                headers = session["headers"]
+                item_type = random.choice(list(ITEM_ROUTES))
+                list_url, reveal_url, delete_url, make = ITEM_ROUTES[item_type]
+                op = random.choices(ops, weights)[0]
+                if op == "login":
+                    session["headers"] = await login(session["email"]) or headers
+                elif op == "list":
+                    await call(f"GET {list_url}", "GET", list_url, headers=headers)
+                elif op == "snapshot":
+                    await call("GET /vault/", "GET", "/vault/", headers=headers)
+                elif op == "reveal" and session["ids"][item_type]:
+                    item_id = random.choice(session["ids"][item_type])
+                    await call(f"GET {reveal_url}", "GET", reveal_url.format(id=item_id), headers=headers)
+                elif op == "delete" and session["added"][item_type]:
+                    item_id = session["added"][item_type].pop()
+                    await call(f"DELETE {delete_url}", "DELETE", delete_url.format(id=item_id), headers=headers)
+                else:
+                    # add, or delete with nothing bench-created left to remove
+                    response = await call(f"POST {list_url}", "POST", list_url, json=make(), headers=headers)
+                    if response.status_code < 400:
+                        session["added"][item_type].append(response.json()["id"])
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    if not args.keep:
+        await clear_bench_users()
+    hashing.shutdown()
+    return recorder.report(elapsed)
+
+
+def print_report(report):
+    print(f"\n{report['requests']} requests in {report['elapsed_s']}s  ->  {report['rps']} req/s\n")
+    print(f"{'route':42} {'count':>7} {'err':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for route, row in report["routes"].items():
+        print(f"{route:42} {row['count']:>7} {row['errors']:>5} {row['rps']:>8} "
+              f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9}")
+
+
+def main():
+    args = parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+    if args.in_memory:
+        import pymongo
+        from mongomock_motor import AsyncMongoMockClient
+        pymongo.AsyncMongoClient = AsyncMongoMockClient
+        os.environ.setdefault("MONGO_URI", "mongodb://in-memory")
+    os.environ.setdefault("SECRET", "bench-secret")
+    # A handful of bench accounts logging in repeatedly would trip the per-email auth limits
+    os.environ.setdefault("RATE_LIMITS", json.dumps({
+        route: {"ip": [1_000_000, 1], "email": [1_000_000, 1]} for route in ("token", "pepper")
+    }))
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import os
+import random
+import string
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptography.fernet import Fernet
+from db_config import db
+from encryptor import encrypt_password
+from hashing import hash_password
+from operations import insert_items
+from purge import USER_COLLECTIONS
+
+users_collection = db["users"]
+
+BENCH_DOMAIN = "bench.securepass.local"
+BENCH_PASSWORD = "bench-password"
+
+
+def _word(n=8):
+    return "".join(random.choices(string.ascii_lowercase, k=n))
+
+
+def _secret(n=24):
+    return "".join(random.choices(string.ascii_letters + string.digits + string.punctuation, k=n))
+
+
+async def seed_user(index, credentials=100, products=10, notes=10, api_keys=10, note_size=512):
+    email = f"user{index}@{BENCH_DOMAIN}"
+    key = Fernet.generate_key()
+    cipher = Fernet(key)
+    await users_collection.delete_one({"username": email})
+    result = await users_collection.insert_one({
+        "username": email,
+        "password": await hash_password(BENCH_PASSWORD),
+        "key": key,
+        "salt": _word(16),
+        "is_admin": False,
+    })
+    user_id = result.inserted_id
+
+    # Through the same write path as the API, so search entries and list versions exist too
+    async def insert(item_type, count, make):
+        for start in range(0, count, 1000):
+            docs = [make() for _ in range(min(1000, count - start))]
+            for doc in docs:
+                doc["user_id"] = user_id
+            await insert_items(item_type, str(user_id), docs)
+
+    await insert("credential", credentials, lambda: {
+        "site": f"{_word()}.com",
+        "username": _word(),
+        "password": encrypt_password(_secret(), cipher),
+    })
+    await insert("product", products, lambda: {
+        "product_name": _word().title(),
+        "license_key": encrypt_password(_secret(29), cipher),
+        "description": _word(20),
+    })
+    await insert("note", notes, lambda: {
+        "title": _word(12),
+        "content": encrypt_password(_secret(note_size), cipher),
+    })
+    await insert("api_key", api_keys, lambda: {
+        "service_name": _word().title(),
+        "api_key": encrypt_password(_secret(40), cipher),
+        "description": _word(20),
+    })
+    return email, str(user_id)
+
+
+async def clear_bench_users():
+    ids = [u["_id"] async for u in users_collection.find({"username": {"$regex": f"@{BENCH_DOMAIN}$"}}, projection={"_id": 1})]
+    for collection in USER_COLLECTIONS.values():
+        await collection.delete_many({"user_id": {"$in": ids}})
+    await users_collection.delete_many({"_id": {"$in": ids}})
+    return len(ids)
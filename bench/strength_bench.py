@@ -0,0 +1,78 @@
+"""Passwords-per-second for the strength engine, before and after the single-pass rewrite.
+
+    python bench/strength_bench.py --count 50000
+"""
+import argparse
+import math
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import strength_test
+
+
+def legacy_get_charset_size(password: str) -> int:
+    # The original five-scan implementation, kept here as the baseline
+    charset = 0
+    if any(c in string.ascii_lowercase for c in password):
+        charset += 26
+    if any(c in string.ascii_uppercase for c in password):
+        charset += 26
+    if any(c in string.digits for c in password):
+        charset += 10
+    if any(c in string.punctuation for c in password):
+        charset += len(string.punctuation)
+    if any(ord(c) > 127 for c in password):
+        charset += 100
+    return charset
+
+
+def legacy_score(password):
+    charset_size = legacy_get_charset_size(password)
+    entropy = round(len(password) * math.log2(charset_size), 2) if charset_size else 0.0
+    times = dict(strength_test._crack_times.__wrapped__(entropy))
+    return charset_size, entropy, times, strength_test.get_verdict(entropy)
+
+
+def make_passwords(count, seed=7):
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + string.punctuation
+    words = list(strength_test.common_password_ranks())
+    passwords = []
+    for _ in range(count):
+        if rng.random() < 0.3:
+            passwords.append(rng.choice(words).capitalize() + str(rng.randint(0, 9999)))
+        else:
+            passwords.append("".join(rng.choices(alphabet, k=rng.randint(8, 64))))
+    return passwords
+
+
+def measure(label, fn, passwords):
+    start = time.perf_counter()
+    fn(passwords)
+    elapsed = time.perf_counter() - start
+    print(f"{label:28} {len(passwords) / elapsed:>14,.0f} passwords/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=20000)
+    args = parser.parse_args()
+    passwords = make_passwords(args.count)
+
+    for p in passwords[:1000]:
+        assert legacy_get_charset_size(p) == strength_test.get_charset_size(p), p
+
+    measure("charset size (legacy)", lambda ps: [legacy_get_charset_size(p) for p in ps], passwords)
+    measure("charset size (single pass)", lambda ps: [strength_test.get_charset_size(p) for p in ps], passwords)
+    measure("full score (legacy)", lambda ps: [legacy_score(p) for p in ps], passwords)
+    measure("full score (batch)", strength_test.score_passwords, passwords)
+    measure("full score (batch, pattern)", lambda ps: strength_test.score_passwords(ps, "pattern"), passwords)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import time
+import threading
+from collections import OrderedDict
+from metrics import CACHE_EVENTS
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire `ttl` seconds after being set.
+
+    A `name` also counts hits and misses in the cache_lookups metric.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300, name: str | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._hit = CACHE_EVENTS.labels(name, "hit") if name else None
+        self._miss = CACHE_EVENTS.labels(name, "miss") if name else None
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and time.monotonic() >= entry[0]:
+                del self._data[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                if self._miss:
+                    self._miss.inc()
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            if self._hit:
+                self._hit.inc()
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
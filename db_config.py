@@ -1,14 +1,78 @@
 import os
+import time
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient
+from metrics import MongoCommandListener
 
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")  # get from environment variable
+DB_NAME = "vault_db"
 
-if not MONGO_URI:
-    raise Exception("MONGO_URI environment variable not set")
+# Pool sizing and timeouts; the defaults match the driver's own except for the
+# shorter server selection timeout, so a missing Mongo fails readiness quickly.
+POOL_OPTIONS = {
+    "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+    "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+    "maxIdleTimeMS": int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "0")) or None,
+    "connectTimeoutMS": int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "20000")),
+    "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+    "waitQueueTimeoutMS": int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "0")) or None,
+}
 
-client = MongoClient(MONGO_URI)
-db = client["vault_db"]
+_client = None
+
+
+def get_client():
+    # Built on first use so importing a module that touches `db` costs nothing
+    global _client
+    if _client is None:
+        if not MONGO_URI:
+            raise Exception("MONGO_URI environment variable not set")
+        # Async driver: every query is awaited on the event loop instead of
+        # parking a threadpool worker while Mongo responds.
+        _client = AsyncMongoClient(MONGO_URI, event_listeners=[MongoCommandListener()], **POOL_OPTIONS)
+    return _client
+
+
+class _LazyCollection:
+    """Stands in for a collection until it is first used, then forwards to it."""
+
+    def __init__(self, name):
+        self._name = name
+        self._target = None
+
+    def __getattr__(self, attr):
+        if self._target is None:
+            self._target = get_client()[DB_NAME][self._name]
+        return getattr(self._target, attr)
+
+
+class _LazyDatabase:
+    def __init__(self):
+        self._collections = {}
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = _LazyCollection(name)
+        return self._collections[name]
+
+    def __getattr__(self, attr):
+        return getattr(get_client()[DB_NAME], attr)
+
+
+db = _LazyDatabase()
 vault_collection = db["collection"]
+
+
+async def ping() -> float:
+    # Round trip in milliseconds; raises if Mongo cannot be reached
+    start = time.perf_counter()
+    await get_client().admin.command("ping")
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+async def close():
+    # A closed client reconnects on next use, so the lazy collections stay valid
+    if _client is not None:
+        await _client.close()
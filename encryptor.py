@@ -1,7 +1,48 @@
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet, InvalidToken
+from metrics import timed
 
-def encrypt_password(password: str, key: bytes) -> str:
-    return Fernet(key).encrypt(password.encode()).decode()
+def get_cipher(key):
+    # Accept a raw Fernet key, a list of keys (newest first, e.g. mid-rotation)
+    # or an already-built cipher object.
+    if isinstance(key, (Fernet, MultiFernet)):
+        return key
+    if isinstance(key, (list, tuple)):
+        if len(key) == 1:
+            return Fernet(key[0])
+        return MultiFernet([Fernet(k) for k in key])
+    return Fernet(key)
 
-def decrypt_password(token: str, key: bytes) -> str:
-    return Fernet(key).decrypt(token.encode()).decode()
+def encrypt_password(password: str, key) -> str:
+    with timed("fernet_encrypt"):
+        return get_cipher(key).encrypt(password.encode()).decode()
+
+def decrypt_password(token: str, key) -> str:
+    with timed("fernet_decrypt"):
+        return get_cipher(key).decrypt(token.encode()).decode()
+
+def reencrypt_password(token: str, key) -> str:
+    # Checks the token is readable and, while several keys are live, moves it to the newest one
+    cipher = get_cipher(key)
+    if isinstance(cipher, MultiFernet):
+        return cipher.rotate(token.encode()).decode()
+    cipher.decrypt(token.encode())
+    return token
+
+def rotate_tokens(keys, tokens):
+    # Runs in a worker process: keys are raw bytes, newest first. Unreadable tokens map to None;
+    # tokens already on the newest key come back unchanged so callers can skip rewriting them.
+    cipher = get_cipher(list(keys))
+    current = Fernet(keys[0])
+    rotated = []
+    for token in tokens:
+        try:
+            current.decrypt(token.encode())
+            rotated.append(token)
+            continue
+        except InvalidToken:
+            pass
+        try:
+            rotated.append(reencrypt_password(token, cipher))
+        except InvalidToken:
+            rotated.append(None)
+    return rotated
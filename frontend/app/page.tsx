@@ -70,15 +70,11 @@ export default function Home() {
       const pepper = Uint8Array.from(atob(pepperData.pepper), c => c.charCodeAt(0));
       const hashedPassword = await hashPasswordWithPepper(loginPassword, pepper);
 
-      const formData = new URLSearchParams();
-      formData.append('grant_type', 'password');
-      formData.append('username', loginEmail);
-      formData.append('password', hashedPassword);
-
-      const res = await fetch('/auth/token', {
+      // One round trip returns the token, salt and admin flag together
+      const res = await fetch('/auth/login', {
         method: 'POST',
-        headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
-        body: formData.toString(),
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ username: loginEmail, password: hashedPassword }),
       });
 
       const data = await res.json();
@@ -94,18 +90,7 @@ export default function Home() {
         return;
       }
 
-      const saltRes = await fetch(`/auth/salt?username=${encodeURIComponent(loginEmail)}`, {
-        headers: { Authorization: `Bearer ${data.access_token}` },
-      });
-
-      const saltData = await saltRes.json();
-      if (!saltRes.ok || !saltData.salt) {
-        toast.dismiss();
-        toast.error(saltData.detail || 'Could not fetch salt');
-        return;
-      }
-
-      const salt = Uint8Array.from(atob(saltData.salt), c => c.charCodeAt(0));
+      const salt = Uint8Array.from(atob(data.salt), c => c.charCodeAt(0));
       toast.success('Login successful!');
       toast.loading('Initiating Encryption...');
 
@@ -115,23 +100,14 @@ export default function Home() {
       const sessionKey = crypto.randomUUID();
 
       sessionStorage.setItem('token', data.access_token);
-      sessionStorage.setItem('salt', saltData.salt);
+      sessionStorage.setItem('salt', data.salt);
       sessionStorage.setItem('vault-password', encryptText(loginPassword, sessionKey));
       sessionStorage.setItem('user-email', loginEmail);
 
       setDerivedKey(key);
 
-      const meRes = await fetch('/auth/me', {
-        headers: { Authorization: `Bearer ${data.access_token}` },
-      });
-
-      if (meRes.ok) {
-        const meData = await meRes.json();
-        // eslint-disable-next-line @typescript-eslint/no-unused-expressions
-        meData.is_admin ? router.push('/admin') : router.push('/vault');
-      } else {
-        router.push('/vault');
-      }
+      // eslint-disable-next-line @typescript-eslint/no-unused-expressions
+      data.is_admin ? router.push('/admin') : router.push('/vault');
     } catch (err) {
       toast.dismiss();
       console.error(err);
@@ -42,33 +42,16 @@ export default function VaultDisplay({
 
         const fetchEntries = async () => {
             try {
-                const [resCredentials, resProducts, resNotes, resApiKeys] = await Promise.all([
-                    fetch(`/credentials`, {
-                        headers: { Authorization: `Bearer ${userToken}` },
-                    }),
-                    fetch(`https://securepassvault-1.onrender.com/products/`, {
-                        headers: { Authorization: `Bearer ${userToken}` },
-                    }),
-                    fetch(`https://securepassvault-1.onrender.com/notes/`, {
-                        headers: { Authorization: `Bearer ${userToken}` },
-                    }),
-                    fetch(`https://securepassvault-1.onrender.com/api-keys/`, {
-                        headers: { Authorization: `Bearer ${userToken}` },
-                    }),
-                ]);
+                const res = await fetch(`https://securepassvault-1.onrender.com/vault/`, {
+                    headers: { Authorization: `Bearer ${userToken}` },
+                });
 
-                if (!resCredentials.ok || !resProducts.ok || !resNotes.ok|| !resApiKeys.ok) {
-                    const errCredentials = await resCredentials.json().catch(() => ({}));
-                    const errProducts = await resProducts.json().catch(() => ({}));
-                    const errNotes = await resNotes.json().catch(() => ({}));
-                    const errApiKeys = await resApiKeys.json().catch(() => ({}));
-                    throw new Error(errCredentials?.detail || errProducts?.detail || errNotes||errApiKeys ||'Failed to fetch entries');
+                if (!res.ok) {
+                    const err = await res.json().catch(() => ({}));
+                    throw new Error(err?.detail || 'Failed to fetch entries');
                 }
 
-                const dataCredentials = await resCredentials.json();
-                const dataProducts = await resProducts.json();
-                const dataNotes = await resNotes.json();
-                const dataApiKeys = await resApiKeys.json();
+                const { credentials: dataCredentials, products: dataProducts, notes: dataNotes, api_keys: dataApiKeys } = await res.json();
 
                 const combined: (VaultEntry | LicenseEntry | NoteEntry | ApiEntry)[] = [...dataCredentials, ...dataProducts, ...dataNotes, ...dataApiKeys];
                 setEntriesRef.current(combined);
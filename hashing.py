@@ -0,0 +1,111 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+from metrics import CRYPTO_LATENCY, HASH_QUEUE_DEPTH, HASH_REJECTED
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", str(HASH_WORKERS * 8)))
+HASH_RETRY_AFTER = int(os.getenv("HASH_RETRY_AFTER", "2"))
+
+_executor = None
+_pending = 0  # submitted but not finished; only touched from the event loop
+_stats = {
+    "completed": 0,
+    "rejected": 0,
+    "failed": 0,
+    "total_seconds": 0.0,
+    "max_seconds": 0.0,
+}
+
+
+class HashQueueFull(Exception):
+    pass
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+    return _executor
+
+
+def _reset_executor(broken):
+    # Only the first caller to see a broken pool replaces it; the rest reuse the new one
+    global _executor
+    if _executor is broken:
+        print("bcrypt pool broken (a worker died), rebuilding")
+        broken.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _hashpw(password: bytes) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt())
+
+
+def _checkpw(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+async def _submit(operation, fn, *args):
+    global _pending
+    if _pending >= HASH_QUEUE_SIZE:
+        _stats["rejected"] += 1
+        HASH_REJECTED.inc()
+        raise HashQueueFull()
+    _pending += 1
+    HASH_QUEUE_DEPTH.inc()
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    try:
+        # A killed worker (e.g. OOM) breaks the whole pool: rebuild it and retry once,
+        # then shed load with the usual 503 rather than fail every later login
+        for attempt in range(2):
+            executor = _get_executor()
+            try:
+                result = await loop.run_in_executor(executor, fn, *args)
+                break
+            except BrokenProcessPool:
+                _reset_executor(executor)
+                if attempt:
+                    raise HashQueueFull()
+    except Exception:
+        _stats["failed"] += 1
+        raise
+    finally:
+        _pending -= 1
+        HASH_QUEUE_DEPTH.dec()
+    elapsed = time.perf_counter() - start
+    CRYPTO_LATENCY.labels(operation).observe(elapsed)
+    _stats["completed"] += 1
+    _stats["total_seconds"] += elapsed
+    _stats["max_seconds"] = max(_stats["max_seconds"], elapsed)
+    return result
+
+
+async def hash_password(password: str) -> bytes:
+    return await _submit("bcrypt_hash", _hashpw, password.encode())
+
+
+async def check_password(password: str, hashed: bytes) -> bool:
+    return await _submit("bcrypt_check", _checkpw, password.encode(), hashed)
+
+
+def hash_stats() -> dict:
+    completed = _stats["completed"]
+    return {
+        "workers": HASH_WORKERS,
+        "queue_size": HASH_QUEUE_SIZE,
+        "queue_depth": _pending,
+        **_stats,
+        "avg_seconds": round(_stats["total_seconds"] / completed, 4) if completed else 0.0,
+    }
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,56 @@
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import PyMongoError
+from db_config import db
+
+OTP_TTL_SECONDS = 300
+
+# collection name -> indexes it must have; names are fixed so re-runs are no-ops
+INDEXES = {
+    "collection": [IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_1__id_1")],
+    "products": [IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_1__id_1")],
+    "notes": [IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_1__id_1")],
+    "api_keys": [IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_1__id_1")],
+    "password_audit": [
+        IndexModel([("user_id", ASCENDING), ("estimator", ASCENDING)], name="user_id_1_estimator_1"),
+        IndexModel(
+            [("credential_id", ASCENDING), ("estimator", ASCENDING)], name="credential_id_1_estimator_1_unique",
+            unique=True, partialFilterExpression={"credential_id": {"$exists": True}},
+        ),
+    ],
+    "search_index": [IndexModel([("user_id", ASCENDING), ("type", ASCENDING)], name="user_id_1_type_1")],
+    "users": [IndexModel([("username", ASCENDING)], name="username_unique", unique=True)],
+    "pending_otps": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        # Mongo's TTL monitor removes the OTP once expires_at has passed
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "purge_jobs": [IndexModel([("status", ASCENDING)], name="status_1")],
+    # At most one unfinished key rotation per user
+    "rotation_jobs": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_active_unique", unique=True, partialFilterExpression={"active": True}),
+    ],
+    "email_outbox": [
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_1_next_attempt_at_1"),
+        # Keep a day of sent and failed mail for debugging, then let Mongo drop it
+        IndexModel([("finished_at", ASCENDING)], name="finished_at_ttl", expireAfterSeconds=86400),
+    ],
+    "rate_limits": [IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0)],
+    "black": [IndexModel([("email", ASCENDING)], name="email_unique", unique=True)],
+}
+
+async def ensure_indexes():
+    report = {"created": [], "existing": [], "failed": {}}
+    for collection_name, models in INDEXES.items():
+        collection = db[collection_name]
+        try:
+            existing = await collection.index_information()
+            missing = [m for m in models if m.document["name"] not in existing]
+            report["existing"].extend(
+                f"{collection_name}.{m.document['name']}" for m in models if m not in missing
+            )
+            if missing:
+                await collection.create_indexes(missing)
+                report["created"].extend(f"{collection_name}.{m.document['name']}" for m in missing)
+        except PyMongoError as e:
+            report["failed"][collection_name] = str(e)
+    return report
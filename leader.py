@@ -0,0 +1,157 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import DuplicateKeyError
+from db_config import db
+
+LEADER_LEASE_SECONDS = float(os.getenv("LEADER_LEASE_SECONDS", "30"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", str(LEADER_LEASE_SECONDS)))
+
+leases_collection = db["leases"]
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _holder():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaderLease:
+    """A named Mongo lease held by at most one process at a time.
+
+    Every worker runs one; the holder renews it every third of the lease and the
+    others keep trying, so a dead leader is replaced within LEADER_LEASE_SECONDS.
+    """
+
+    def __init__(self, name, on_acquire=None, on_release=None, ttl=LEADER_LEASE_SECONDS):
+        self.name = name
+        self.ttl = ttl
+        self.on_acquire = on_acquire
+        self.on_release = on_release
+        # Built per instance, i.e. after any fork, so pre-forked workers differ
+        self.holder = _holder()
+        self.is_leader = False
+        self._task = None
+
+    async def _try_acquire(self):
+        now = _now()
+        try:
+            # Matches only if we hold it or it has lapsed; otherwise the upsert
+            # collides with the existing _id and someone else stays leader.
+            await leases_collection.find_one_and_update(
+                {"_id": self.name, "$or": [{"holder": self.holder}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"holder": self.holder, "expires_at": now + timedelta(seconds=self.ttl), "renewed_at": now}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def _set_leader(self, held):
+        if held == self.is_leader:
+            return
+        self.is_leader = held
+        print(f"Lease {self.name} | {'acquired' if held else 'lost'} by {self.holder}")
+        callback = self.on_acquire if held else self.on_release
+        if callback is not None:
+            try:
+                await callback()
+            except Exception as e:
+                print(f"Lease {self.name} callback error: {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                held = await self._try_acquire()
+            except Exception as e:
+                # Cannot renew, so assume the lease will lapse rather than risk two leaders
+                print(f"Lease {self.name} error: {e}")
+                held = False
+            await self._set_leader(held)
+            await asyncio.sleep(self.ttl / 3)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_leader:
+            await self._set_leader(False)
+            # Hand over immediately instead of making the next leader wait out the lease
+            try:
+                await leases_collection.delete_one({"_id": self.name, "holder": self.holder})
+            except Exception as e:
+                print(f"Lease {self.name} release error: {e}")
+
+    def status(self):
+        return {"name": self.name, "holder": self.holder, "leader": self.is_leader}
+
+
+class JobLease:
+    """Claims one background job document (purge, key rotation) for the calling task.
+
+    The claim lives on the job itself as runner/runner_until and is renewed every
+    third of the lease. If renewal finds another runner, or cannot reach Mongo for a
+    whole lease, the task is cancelled so the job never runs in two processes at once.
+    """
+
+    def __init__(self, collection, job_id, ttl=JOB_LEASE_SECONDS):
+        self.collection = collection
+        self.job_id = job_id
+        self.ttl = ttl
+        self.holder = _holder()
+        self._heartbeat = None
+
+    async def acquire(self):
+        now = _now()
+        result = await self.collection.update_one(
+            {"_id": self.job_id, "$or": [{"runner_until": None}, {"runner_until": {"$lt": now}}]},
+            {"$set": {"runner": self.holder, "runner_until": now + timedelta(seconds=self.ttl)}},
+        )
+        if not result.matched_count:
+            return False
+        self._heartbeat = asyncio.create_task(self._renew(asyncio.current_task()))
+        return True
+
+    async def _renew(self, task):
+        renewed = asyncio.get_running_loop().time()
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                result = await self.collection.update_one(
+                    {"_id": self.job_id, "runner": self.holder},
+                    {"$set": {"runner_until": _now() + timedelta(seconds=self.ttl)}},
+                )
+                if not result.matched_count:
+                    print(f"Job {self.job_id} taken over by another runner")
+                    task.cancel()
+                    return
+                renewed = asyncio.get_running_loop().time()
+            except Exception as e:
+                print(f"Job {self.job_id} lease error: {e}")
+                if asyncio.get_running_loop().time() - renewed > self.ttl:
+                    task.cancel()
+                    return
+
+    async def release(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        try:
+            await self.collection.update_one(
+                {"_id": self.job_id, "runner": self.holder},
+                {"$unset": {"runner": "", "runner_until": ""}},
+            )
+        except Exception as e:
+            print(f"Job {self.job_id} release error: {e}")
@@ -1,12 +1,91 @@
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from Routers import credentials_router, auth_router, admin_router, utils_router, products_router, notes_router, api_keys_router
+from Routers import credentials_router, auth_router, admin_router, utils_router, products_router, notes_router, api_keys_router, vault_router, metrics_router, health_router
 from fastapi.middleware.cors import CORSMiddleware
-from apscheduler.schedulers.background import BackgroundScheduler
-import httpx
 from fastapi.responses import HTMLResponse
+import db_config
+import hashing
+from indexes import ensure_indexes
+import purge
+import rotation
+from leader import LeaderLease
+from utils.outbox import start_outbox, stop_outbox
+from metrics import PrometheusMiddleware, timed_job, scheduler_listener
+from utils.responses import VaultJSONResponse
 
 
-app = FastAPI(title="SecurePassVault API")
+@timed_job("ping_site")
+def ping_site():
+    import httpx
+    try:
+        url = "https://securepass-vault.onrender.com/"
+        response = httpx.get(url, timeout=10)
+        print(f"Pinged {url} | Status : {response.status_code}")
+    except Exception as e:
+        print(f"Ping error: {e}")
+
+def start_scheduler():
+    # Imported here so `import main` stays cheap for tests and tooling.
+    # Every worker starts paused; only the lease holder resumes it.
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.events import EVENT_JOB_MISSED
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(ping_site, 'interval', minutes=13, id="ping_site")
+    scheduler.add_listener(scheduler_listener, EVENT_JOB_MISSED)
+    scheduler.start(paused=True)
+    return scheduler
+
+async def resume_jobs():
+    # Logged, not raised, as with ensure_indexes: a Mongo outage must not abort startup
+    # or keep the scheduler paused. The jobs stay in Mongo for the next lease holder.
+    for name, resume in (("purge", purge.resume_purges), ("key rotation", rotation.resume_rotations)):
+        try:
+            resumed = await resume()
+        except Exception as e:
+            print(f"Could not resume {name} jobs: {e}")
+            continue
+        if resumed:
+            print(f"Resumed {resumed} {name} job(s)")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.started_at = time.monotonic()
+    # Open the pool before taking traffic; a Mongo outage is logged and left to /readyz
+    try:
+        print(f"Mongo | ping {await db_config.ping()} ms")
+    except Exception as e:
+        print(f"Mongo | unreachable at startup: {e}")
+    report = await ensure_indexes()
+    print(f"Indexes | created: {report['created'] or 'none'} | failed: {report['failed'] or 'none'}")
+    start_outbox()
+    scheduler = start_scheduler()
+
+    async def lead():
+        # Scheduled jobs and unfinished purge/rotation jobs run in one worker only
+        await resume_jobs()
+        scheduler.resume()
+
+    async def follow():
+        scheduler.pause()
+
+    app.state.lease = LeaderLease("scheduler", on_acquire=lead, on_release=follow)
+    app.state.lease.start()
+    app.state.ready = True
+    try:
+        yield
+    finally:
+        app.state.ready = False
+        await app.state.lease.stop()
+        scheduler.shutdown(wait=False)
+        await stop_outbox()
+        hashing.shutdown()
+        purge.shutdown()
+        rotation.shutdown()
+        await db_config.close()
+
+
+app = FastAPI(title="SecurePassVault API", default_response_class=VaultJSONResponse, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,7 +93,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+app.add_middleware(PrometheusMiddleware)
 
 app.include_router(auth_router.router)
 app.include_router(credentials_router.router)
@@ -23,21 +104,12 @@ app.include_router(utils_router.router)
 app.include_router(products_router.router)
 app.include_router(notes_router.router)
 app.include_router(api_keys_router.router)
-
-def ping_site():
-    try:
-        url = "https://securepass-vault.onrender.com/"
-        response = httpx.get(url, timeout=10)
-        print(f"Pinged {url} | Status : {response.status_code}")
-    except Exception as e:
-        print(f"Ping error: {e}")
-
-scheduler = BackgroundScheduler()
-scheduler.add_job(ping_site, 'interval', minutes=13)
-scheduler.start()
+app.include_router(vault_router.router)
+app.include_router(metrics_router.router)
+app.include_router(health_router.router)
 
 @app.get("/", response_class=HTMLResponse)
-def root():
+async def root():
     html_content = """
     <html>
         <head>
@@ -0,0 +1,118 @@
+import time
+from anyio import to_thread
+from prometheus_client import Counter, Gauge, Histogram
+from pymongo import monitoring
+from starlette.routing import Match
+
+FAST_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"]
+)
+# Gauges say how serve.py's workers combine under PROMETHEUS_MULTIPROC_DIR: summed over live processes
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", ["method", "route"], multiprocess_mode="livesum"
+)
+MONGO_COMMAND_LATENCY = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ["command", "outcome"], buckets=FAST_BUCKETS
+)
+CRYPTO_LATENCY = Histogram(
+    "crypto_operation_duration_seconds", "Fernet and bcrypt operation latency", ["operation"], buckets=FAST_BUCKETS
+)
+THREADPOOL_BORROWED = Gauge("threadpool_threads_in_use", "Threadpool tokens currently borrowed", multiprocess_mode="livesum")
+THREADPOOL_TOTAL = Gauge("threadpool_threads_total", "Threadpool token capacity", multiprocess_mode="livesum")
+HASH_QUEUE_DEPTH = Gauge("bcrypt_queue_depth", "bcrypt jobs submitted and not yet finished", multiprocess_mode="livesum")
+HASH_REJECTED = Counter("bcrypt_rejected", "bcrypt jobs rejected because the queue was full")
+CACHE_EVENTS = Counter("cache_lookups", "Cache lookups by outcome", ["cache", "outcome"])
+SCHEDULER_JOB_RUNS = Counter("scheduler_job_runs", "Scheduled job runs by outcome", ["job", "outcome"])
+SCHEDULER_JOB_LATENCY = Histogram("scheduler_job_duration_seconds", "Scheduled job run time", ["job"])
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_LATENCY.labels(event.command_name, "ok").observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_COMMAND_LATENCY.labels(event.command_name, "error").observe(event.duration_micros / 1e6)
+
+
+class timed:
+    """Context manager observing elapsed time into CRYPTO_LATENCY under `operation`."""
+
+    def __init__(self, operation):
+        self.histogram = CRYPTO_LATENCY.labels(operation)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+def timed_job(name):
+    def decorator(fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                SCHEDULER_JOB_RUNS.labels(name, "error").inc()
+                raise
+            finally:
+                SCHEDULER_JOB_LATENCY.labels(name).observe(time.perf_counter() - start)
+            SCHEDULER_JOB_RUNS.labels(name, "ok").inc()
+            return result
+        wrapper.__name__ = fn.__name__
+        return wrapper
+    return decorator
+
+
+def scheduler_listener(event):
+    # Wired to APScheduler's EVENT_JOB_MISSED so skipped runs show up too
+    SCHEDULER_JOB_RUNS.labels(event.job_id, "missed").inc()
+
+
+class PrometheusMiddleware:
+    # Plain ASGI middleware; labels use the route's path template so
+    # /credentials/reveal/<id> does not create one series per id.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        route = self._route_template(scope)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        # Sampled per request rather than per scrape, so every worker's value stays current
+        limiter = to_thread.current_default_thread_limiter()
+        THREADPOOL_BORROWED.set(limiter.borrowed_tokens)
+        THREADPOOL_TOTAL.set(limiter.total_tokens)
+        in_flight = REQUESTS_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            REQUEST_LATENCY.labels(method, route, str(status["code"])).observe(time.perf_counter() - start)
+
+    def _route_template(self, scope):
+        partial = None
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+            if match == Match.PARTIAL and partial is None:
+                partial = route.path
+        return partial or "unmatched"
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Annotated, Literal, Union
+from datetime import datetime
 
 class UserRegister(BaseModel):
     username:str
@@ -36,4 +38,298 @@ class NoteIn(BaseModel):
 class APIKeyIn(BaseModel):
     service_name: str
     api_key: str
-    description: str | None = None
\ No newline at end of file
+    description: str | None = None
+
+class CredentialOut(BaseModel):
+    id: str
+    site: str
+    username: str
+
+class ProductKeyOut(BaseModel):
+    id: str
+    product_name: str
+    description: str | None = None
+
+class NoteOut(BaseModel):
+    id: str
+    title: str
+
+class APIKeyOut(BaseModel):
+    id: str
+    service_name: str
+    description: str | None = None
+
+class VaultSnapshot(BaseModel):
+    credentials: list[CredentialOut]
+    products: list[ProductKeyOut]
+    notes: list[NoteOut]
+    api_keys: list[APIKeyOut]
+
+class RevealItem(BaseModel):
+    type: Literal["credential", "product", "note", "api_key"]
+    id: str
+
+class BulkRevealRequest(BaseModel):
+    items: list[RevealItem] = Field(..., max_length=500)
+
+BATCH_CREATE_LIMIT = 5000
+
+# Batch creates: the whole payload is validated before anything is written.
+# ordered=True stops at the first failed write; otherwise every valid item is attempted.
+class CredentialBatch(BaseModel):
+    items: list[CredentialIn] = Field(..., min_length=1, max_length=BATCH_CREATE_LIMIT)
+    ordered: bool = False
+
+class ProductKeyBatch(BaseModel):
+    items: list[ProductKeyIn] = Field(..., min_length=1, max_length=BATCH_CREATE_LIMIT)
+    ordered: bool = False
+
+class NoteBatch(BaseModel):
+    items: list[NoteIn] = Field(..., min_length=1, max_length=BATCH_CREATE_LIMIT)
+    ordered: bool = False
+
+class APIKeyBatch(BaseModel):
+    items: list[APIKeyIn] = Field(..., min_length=1, max_length=BATCH_CREATE_LIMIT)
+    ordered: bool = False
+
+class CredentialItem(CredentialIn):
+    type: Literal["credential"]
+
+class ProductKeyItem(ProductKeyIn):
+    type: Literal["product"]
+
+class NoteItem(NoteIn):
+    type: Literal["note"]
+
+class APIKeyItem(APIKeyIn):
+    type: Literal["api_key"]
+
+VaultItem = Annotated[Union[CredentialItem, ProductKeyItem, NoteItem, APIKeyItem], Field(discriminator="type")]
+
+class VaultBatch(BaseModel):
+    items: list[VaultItem] = Field(..., min_length=1, max_length=BATCH_CREATE_LIMIT)
+    ordered: bool = False
+
+class PasswordBatchRequest(BaseModel):
+    passwords: list[str] = Field(..., max_length=10000)
+    estimator: Literal["charset", "pattern"] = "charset"
+
+### Response models
+
+class MessageOut(BaseModel):
+    message: str
+
+class ItemCreated(BaseModel):
+    id: str
+    message: str
+
+class CredentialSecret(BaseModel):
+    site: str
+    username: str
+    password: str
+
+class ProductKeySecret(BaseModel):
+    product_name: str
+    license_key: str
+    description: str | None = None
+
+class NoteSecret(BaseModel):
+    title: str
+    content: str
+
+class APIKeySecret(BaseModel):
+    service_name: str
+    api_key: str
+    description: str | None = None
+
+class CredentialDeleted(BaseModel):
+    site: str
+    username: str
+    status: str
+
+class ProductKeyDeleted(BaseModel):
+    product_name: str
+    status: str
+
+class NoteDeleted(BaseModel):
+    title: str
+    status: str
+
+class APIKeyDeleted(BaseModel):
+    service_name: str
+    status: str
+
+class TokenOut(BaseModel):
+    access_token: str
+    token_type: str
+
+class LoginOut(BaseModel):
+    access_token: str
+    token_type: str
+    salt: str
+    pepper: str | None = None
+    is_admin: bool
+
+class PepperOut(BaseModel):
+    pepper: str
+
+class SaltOut(BaseModel):
+    salt: str
+
+class UserOut(BaseModel):
+    id: str
+    email: str
+    is_admin: bool
+
+class UserDeleted(BaseModel):
+    message: str
+    purge_job: str
+
+class PurgeJobOut(BaseModel):
+    id: str
+    user_id: str
+    status: str
+    progress: dict[str, int]
+    error: str | None = None
+    created_at: datetime
+    updated_at: datetime
+
+class RotationStarted(BaseModel):
+    job_id: str
+
+class RotationJobOut(BaseModel):
+    id: str
+    user_id: str
+    status: str
+    progress: dict[str, int]
+    unreadable: int
+    error: str | None = None
+    reencrypt_after: datetime | None = None
+    created_at: datetime
+    updated_at: datetime
+
+class OrphanSweepOut(BaseModel):
+    purge_jobs: list[str]
+    orphan_peppers_removed: int
+
+class UserCount(BaseModel):
+    total_users: int
+
+class CacheStats(BaseModel):
+    size: int
+    maxsize: int
+    ttl: float
+    hits: int
+    misses: int
+    evictions: int
+    hit_ratio: float
+
+class HashStats(BaseModel):
+    workers: int
+    queue_size: int
+    queue_depth: int
+    completed: int
+    rejected: int
+    failed: int
+    total_seconds: float
+    max_seconds: float
+    avg_seconds: float
+
+class AdminStats(BaseModel):
+    key_cache: CacheStats
+    principal_cache: CacheStats
+    hashing: HashStats
+
+class PasswordStrength(BaseModel):
+    password: str
+    length: int
+    charset_size: int
+    entropy_bits: float
+    estimted_crack_times: dict[str, str]
+    verdict: str
+
+class PasswordScore(BaseModel):
+    length: int
+    charset_size: int
+    entropy_bits: float
+    estimated_crack_times: dict[str, str]
+    verdict: str
+
+class PasswordBatchOut(BaseModel):
+    results: list[PasswordScore]
+
+class GeneratedPassword(BaseModel):
+    password: str
+
+class GeneratedPasswords(BaseModel):
+    passwords: list[str]
+
+# Revealed items and search hits carry only the fields of their own item type;
+# their routes set response_model_exclude_unset so the others stay absent.
+class RevealedItem(BaseModel):
+    type: str
+    id: str
+    found: bool
+    site: str | None = None
+    username: str | None = None
+    password: str | None = None
+    product_name: str | None = None
+    license_key: str | None = None
+    title: str | None = None
+    content: str | None = None
+    service_name: str | None = None
+    api_key: str | None = None
+    description: str | None = None
+
+class BulkRevealOut(BaseModel):
+    items: list[RevealedItem]
+
+class BatchItemResult(BaseModel):
+    index: int
+    type: str
+    id: str | None = None
+    error: str | None = None
+
+class BatchCreateResult(BaseModel):
+    created: int
+    items: list[BatchItemResult]
+
+class ImportIssue(BaseModel):
+    line: int
+    error: str
+
+class ImportResult(BaseModel):
+    imported: int
+    errors: list[ImportIssue]
+
+class AuditEntry(BaseModel):
+    id: str
+    site: str
+    username: str
+
+class WeakCredential(AuditEntry):
+    verdict: str
+    entropy_bits: float
+
+class AuditReport(BaseModel):
+    total: int
+    rescored: int
+    summary: dict[str, int]
+    weak: list[WeakCredential]
+    reused: list[list[AuditEntry]]
+
+class SearchHit(BaseModel):
+    type: str
+    id: str
+    score: int
+    site: str | None = None
+    username: str | None = None
+    product_name: str | None = None
+    title: str | None = None
+    service_name: str | None = None
+    description: str | None = None
+
+class SearchResults(BaseModel):
+    total: int
+    truncated: bool
+    results: list[SearchHit]
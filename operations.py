@@ -1,67 +1,186 @@
 from db_config import vault_collection, db
-from encryptor import encrypt_password, decrypt_password
+from encryptor import encrypt_password, decrypt_password, reencrypt_password, get_cipher
+from cache import TTLCache
 from bson import ObjectId
+from cryptography.fernet import InvalidToken
+from pymongo.errors import BulkWriteError
+import asyncio
+import os
 
 users_collection = db["users"]
 products_collection=db["products"]
 notes_collection = db["notes"]
 api_keys_collection = db["api_keys"]
+search_collection = db["search_index"]
+versions_collection = db["vault_versions"]
+
+# item type -> (collection, encrypted field, plaintext fields returned on reveal)
+ITEM_TYPES = {
+    "credential": (vault_collection, "password", ("site", "username")),
+    "product": (products_collection, "license_key", ("product_name", "description")),
+    "note": (notes_collection, "content", ("title",)),
+    "api_key": (api_keys_collection, "api_key", ("service_name", "description")),
+}
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+
+# user_id -> ready-to-use Fernet cipher, so hot paths skip the users lookup and key setup
+KEY_CACHE_TTL = float(os.getenv("KEY_CACHE_TTL", "300"))
+cipher_cache = TTLCache(maxsize=int(os.getenv("KEY_CACHE_SIZE", "1024")), ttl=KEY_CACHE_TTL, name="key")
+
+async def list_items(collection, user_id, fields, limit=None, after=None):
+    # Keyset pagination on _id; the projection keeps ciphertext off the wire
+    query = {"user_id": ObjectId(user_id)}
+    if after:
+        query["_id"] = {"$gt": ObjectId(after)}
+    cursor = collection.find(query, projection=dict.fromkeys(fields, 1)).sort("_id", 1)
+    if limit:
+        cursor = cursor.limit(limit + 1)
+    docs = [doc async for doc in cursor]
+    next_cursor = None
+    if limit and len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = str(docs[-1]["_id"])
+    return docs, next_cursor
 
 ### Creds:
 
-def get_user_key(user_id):
-    user = users_collection.find_one({"_id": ObjectId(user_id)})
+async def get_user_keys(user_id):
+    # Current key first, then any keys still being rotated out
+    user = await users_collection.find_one({"_id": ObjectId(user_id)}, projection={"key": 1, "old_keys": 1})
     if user and "key" in user:
-        return user['key']
-    else:
-        raise Exception("User not found or key missing.")
+        return [user["key"], *user.get("old_keys", [])]
+    raise Exception("User not found or key missing.")
+
+async def get_user_cipher(user_id):
+    user_id = str(user_id)
+    cipher = cipher_cache.get(user_id)
+    if cipher is None:
+        cipher = get_cipher(await get_user_keys(user_id))
+        cipher_cache.set(user_id, cipher)
+    return cipher
+
+def invalidate_user_key(user_id):
+    cipher_cache.pop(str(user_id))
+
+class UserCipher:
+    """A user's cached cipher for reads, reloaded once when a token will not decrypt.
+
+    Another worker may have switched the user's key (rotation.py) after this process
+    cached it; reloading picks up the new key list instead of failing the read.
+    """
+
+    def __init__(self, user_id, cipher):
+        self.user_id = str(user_id)
+        self.cipher = cipher
+        self._reloaded = False
+
+    async def _call(self, fn, token):
+        try:
+            return fn(token, self.cipher)
+        except InvalidToken:
+            if self._reloaded:
+                raise
+            self._reloaded = True
+            invalidate_user_key(self.user_id)
+            self.cipher = await get_user_cipher(self.user_id)
+            return fn(token, self.cipher)
+
+    async def decrypt(self, token):
+        return await self._call(decrypt_password, token)
+
+    async def reencrypt(self, token):
+        return await self._call(reencrypt_password, token)
+
+async def get_user_decryptor(user_id):
+    return UserCipher(user_id, await get_user_cipher(user_id))
+
+def key_cache_stats():
+    return cipher_cache.stats()
+
+### Version counters: bumped after every write so list ETags change with the data
+
+async def bump_version(user_id, item_type):
+    await versions_collection.update_one(
+        {"_id": ObjectId(user_id)},
+        {"$inc": {item_type: 1}, "$setOnInsert": {"user_id": ObjectId(user_id)}},
+        upsert=True
+    )
+
+async def get_versions(user_id):
+    doc = await versions_collection.find_one({"_id": ObjectId(user_id)})
+    return {item_type: (doc or {}).get(item_type, 0) for item_type in ITEM_TYPES}
+
+### Search index: one small doc per item holding only its plaintext metadata
+
+def search_entry(item_type, item_id, user_id, doc):
+    fields = {f: doc[f] for f in ITEM_TYPES[item_type][2] if doc.get(f)}
+    return {
+        "_id": item_id,
+        "user_id": ObjectId(user_id),
+        "type": item_type,
+        "fields": fields,
+        "text": "\n".join(str(v).lower() for v in fields.values()),
+    }
 
-def add_credential(site, username, password, user_id):
-    key = get_user_key(user_id)
+async def index_item(item_type, item_id, user_id, doc):
+    entry = search_entry(item_type, item_id, user_id, doc)
+    await search_collection.replace_one({"_id": item_id}, entry, upsert=True)
+
+async def unindex_item(item_id):
+    await search_collection.delete_one({"_id": ObjectId(item_id)})
+
+async def add_credential(site, username, password, user_id):
+    key = await get_user_cipher(user_id)
     encrypted_password = encrypt_password(password, key)
-    result = vault_collection.insert_one({
+    result = await vault_collection.insert_one({
         "site": site,
         "username": username,
         "password": encrypted_password,
         "user_id": ObjectId(user_id)
     })
+    await bump_version(user_id, "credential")
+    await index_item("credential", result.inserted_id, user_id, {"site": site, "username": username})
     return str(result.inserted_id)
 
-def view_credentials(user_id):
-    creds = vault_collection.find({"user_id": ObjectId(user_id)})
+async def view_credentials(user_id, limit=None, after=None):
+    creds, next_cursor = await list_items(vault_collection, user_id, ("site", "username"), limit, after)
     return [{
         "id": str(c["_id"]),
         "site": c["site"],
         "username": c["username"]
-    } for c in creds]
+    } for c in creds], next_cursor
 
-def reveal_password(cred_id, user_id):
-    cred = vault_collection.find_one({
+async def reveal_password(cred_id, user_id):
+    cred = await vault_collection.find_one({
         "_id": ObjectId(cred_id),
         "user_id": ObjectId(user_id)
     })
     if not cred:
         return None
-    key = get_user_key(user_id)
-    decrypted_password = decrypt_password(cred["password"], key)
+    key = await get_user_decryptor(user_id)
+    decrypted_password = await key.decrypt(cred["password"])
     return {
         "site": cred["site"],
         "username": cred["username"],
         "password": decrypted_password
     }
 
-def delete_credential(cred_id, user_id):
-    cred = vault_collection.find_one({
+async def delete_credential(cred_id, user_id):
+    cred = await vault_collection.find_one({
         "_id": ObjectId(cred_id),
         "user_id": ObjectId(user_id)
     })
     if not cred:
         return None
-    result = vault_collection.delete_one({
+    result = await vault_collection.delete_one({
         "_id": ObjectId(cred_id),
         "user_id": ObjectId(user_id)
     })
     if result.deleted_count > 0:
+        await unindex_item(cred_id)
+        await bump_version(user_id, "credential")
         return {
             "site": cred["site"],
             "username": cred["username"]
@@ -70,80 +189,86 @@ def delete_credential(cred_id, user_id):
 
 ### Product Key:
 
-def add_product_key(product_name,license_key,description,user_id):
-    key=get_user_key(user_id)
+async def add_product_key(product_name,license_key,description,user_id):
+    key=await get_user_cipher(user_id)
     encrypted_license_key=encrypt_password(license_key,key)
-    result=products_collection.insert_one({
+    result=await products_collection.insert_one({
         "product_name":product_name,
         "license_key":encrypted_license_key,
         "description":description,
         "user_id": ObjectId(user_id)
     })
+    await bump_version(user_id, "product")
+    await index_item("product", result.inserted_id, user_id, {"product_name": product_name, "description": description})
     return str(result.inserted_id)
 
-def view_product_keys(user_id):
-    products=products_collection.find({"user_id":ObjectId(user_id)})
+async def view_product_keys(user_id, limit=None, after=None):
+    products, next_cursor = await list_items(products_collection, user_id, ("product_name", "description"), limit, after)
     return [{
         "id":str(c["_id"]),
         "product_name":(c["product_name"]),
-        "description":(c["description"])
-    } for c in products]
+        "description":(c.get("description"))
+    } for c in products], next_cursor
 
-def reveal_license_key(product_id,user_id):
-    product=products_collection.find_one({
+async def reveal_license_key(product_id,user_id):
+    product=await products_collection.find_one({
         "_id":ObjectId(product_id),
         "user_id":ObjectId(user_id),
     })
     if not product:
         return None
-    key=get_user_key(user_id)
-    decrypted_license_key=decrypt_password(product["license_key"],key)
+    key=await get_user_decryptor(user_id)
+    decrypted_license_key=await key.decrypt(product["license_key"])
     return {
         "product_name":product["product_name"],
         "license_key":decrypted_license_key,
         "description":product["description"],
     }
     
-def delete_product_key(product_id, user_id):
-    product = products_collection.find_one({
+async def delete_product_key(product_id, user_id):
+    product = await products_collection.find_one({
         "_id": ObjectId(product_id),
         "user_id": ObjectId(user_id)
     })
     if not product:
         return None
-    result = products_collection.delete_one({
+    result = await products_collection.delete_one({
         "_id": ObjectId(product_id),
         "user_id": ObjectId(user_id)
     })
     if result.deleted_count > 0:
+        await unindex_item(product_id)
+        await bump_version(user_id, "product")
         return {
             "product_name": product["product_name"]
         }
     return False
 
-def add_note(title, content, user_id):
-    key = get_user_key(user_id)
+async def add_note(title, content, user_id):
+    key = await get_user_cipher(user_id)
     encrypted_content = encrypt_password(content, key)
-    result = notes_collection.insert_one({
+    result = await notes_collection.insert_one({
         "title": title,
         "content": encrypted_content,
         "user_id": ObjectId(user_id)
     })
+    await bump_version(user_id, "note")
+    await index_item("note", result.inserted_id, user_id, {"title": title})
     return str(result.inserted_id)
 
-def view_notes(user_id):
-    notes = notes_collection.find({"user_id": ObjectId(user_id)})
-    return [{"id": str(n["_id"]), "title": n["title"]} for n in notes]
+async def view_notes(user_id, limit=None, after=None):
+    notes, next_cursor = await list_items(notes_collection, user_id, ("title",), limit, after)
+    return [{"id": str(n["_id"]), "title": n["title"]} for n in notes], next_cursor
 
-def reveal_note(note_id, user_id):
-    note = notes_collection.find_one({
+async def reveal_note(note_id, user_id):
+    note = await notes_collection.find_one({
         "_id": ObjectId(note_id),
         "user_id": ObjectId(user_id)
     })
     if not note:
         return None
-    key = get_user_key(user_id)
-    decrypted_content = decrypt_password(note["content"], key)
+    key = await get_user_decryptor(user_id)
+    decrypted_content = await key.decrypt(note["content"])
     return {
         "title": note["title"],
         "content": decrypted_content
@@ -151,70 +276,227 @@ def reveal_note(note_id, user_id):
 
 ### Notes
 
-def delete_note(note_id, user_id):
-    note = notes_collection.find_one({
+async def delete_note(note_id, user_id):
+    note = await notes_collection.find_one({
         "_id": ObjectId(note_id),
         "user_id": ObjectId(user_id)
     })
     if not note:
         return None
-    result = notes_collection.delete_one({
+    result = await notes_collection.delete_one({
         "_id": ObjectId(note_id),
         "user_id": ObjectId(user_id)
     })
     if result.deleted_count > 0:
+        await unindex_item(note_id)
+        await bump_version(user_id, "note")
         return {"title": note["title"]}
     return False
 
 ### API_keys
 
-def add_api_key(service_name, api_key, description, user_id):
-    key = get_user_key(user_id)
+async def add_api_key(service_name, api_key, description, user_id):
+    key = await get_user_cipher(user_id)
     encrypted_api_key = encrypt_password(api_key, key)
-    result = api_keys_collection.insert_one({
+    result = await api_keys_collection.insert_one({
         "service_name": service_name,
         "api_key": encrypted_api_key,
         "description": description,
         "user_id": ObjectId(user_id)
     })
+    await bump_version(user_id, "api_key")
+    await index_item("api_key", result.inserted_id, user_id, {"service_name": service_name, "description": description})
     return str(result.inserted_id)
 
-def view_api_keys(user_id):
-    keys = api_keys_collection.find({"user_id": ObjectId(user_id)})
+async def view_api_keys(user_id, limit=None, after=None):
+    keys, next_cursor = await list_items(api_keys_collection, user_id, ("service_name", "description"), limit, after)
     return [{
         "id": str(k["_id"]),
         "service_name": k["service_name"],
         "description": k.get("description", "")
-    } for k in keys]
+    } for k in keys], next_cursor
 
-def reveal_api_key(api_key_id, user_id):
-    key_doc = api_keys_collection.find_one({
+async def reveal_api_key(api_key_id, user_id):
+    key_doc = await api_keys_collection.find_one({
         "_id": ObjectId(api_key_id),
         "user_id": ObjectId(user_id)
     })
     if not key_doc:
         return None
-    key = get_user_key(user_id)
-    decrypted_api_key = decrypt_password(key_doc["api_key"], key)
+    key = await get_user_decryptor(user_id)
+    decrypted_api_key = await key.decrypt(key_doc["api_key"])
     return {
         "service_name": key_doc["service_name"],
         "api_key": decrypted_api_key,
         "description": key_doc.get("description", "")
     }
 
-def delete_api_key(api_key_id, user_id):
-    key_doc = api_keys_collection.find_one({
+async def delete_api_key(api_key_id, user_id):
+    key_doc = await api_keys_collection.find_one({
         "_id": ObjectId(api_key_id),
         "user_id": ObjectId(user_id)
     })
     if not key_doc:
         return None
-    result = api_keys_collection.delete_one({
+    result = await api_keys_collection.delete_one({
         "_id": ObjectId(api_key_id),
         "user_id": ObjectId(user_id)
     })
     if result.deleted_count > 0:
+        await unindex_item(api_key_id)
+        await bump_version(user_id, "api_key")
         return {
             "service_name": key_doc["service_name"]
         }
     return False
+
+### Bulk
+
+async def reveal_many(items, user_id):
+    # items: [(item_type, item_id), ...]; one $in query per collection, one key lookup
+    wanted = {}
+    for item_type, item_id in items:
+        if ObjectId.is_valid(item_id):
+            wanted.setdefault(item_type, set()).add(ObjectId(item_id))
+
+    async def fetch(item_type, ids):
+        collection = ITEM_TYPES[item_type][0]
+        cursor = collection.find({"_id": {"$in": list(ids)}, "user_id": ObjectId(user_id)})
+        return item_type, {doc["_id"]: doc async for doc in cursor}
+
+    found = dict(await asyncio.gather(*(fetch(t, ids) for t, ids in wanted.items())))
+    key = await get_user_decryptor(user_id) if any(found.values()) else None
+
+    results = []
+    for item_type, item_id in items:
+        doc = found.get(item_type, {}).get(ObjectId(item_id)) if ObjectId.is_valid(item_id) else None
+        if doc is None:
+            results.append({"type": item_type, "id": item_id, "found": False})
+            continue
+        _, secret_field, fields = ITEM_TYPES[item_type]
+        entry = {"type": item_type, "id": item_id, "found": True}
+        entry.update({f: doc.get(f) for f in fields})
+        entry[secret_field] = await key.decrypt(doc[secret_field])
+        results.append(entry)
+    return results
+
+### Batch writes
+
+async def insert_items(item_type, user_id, docs, ordered=False):
+    # Writes already-encrypted docs, then bumps the list version and indexes what landed.
+    # Returns {position in docs: reason} for every doc that was not written.
+    failed = {}
+    try:
+        await ITEM_TYPES[item_type][0].insert_many(docs, ordered=ordered)
+    except BulkWriteError as e:
+        failed = {err["index"]: "Write failed" for err in e.details.get("writeErrors", [])}
+        if ordered and failed:
+            failed.update({i: "Not attempted" for i in range(min(failed) + 1, len(docs))})
+    written = [doc for i, doc in enumerate(docs) if i not in failed]
+    if written:
+        await bump_version(user_id, item_type)
+        await search_collection.insert_many(
+            [search_entry(item_type, doc["_id"], user_id, doc) for doc in written], ordered=False
+        )
+    return failed
+
+async def add_items(user_id, items, ordered=False):
+    # items: [(item_type, fields)] already validated; one key lookup for the whole batch
+    key = await get_user_cipher(user_id)
+    owner = ObjectId(user_id)
+    docs = []
+    for item_type, fields in items:
+        doc = dict(fields, user_id=owner)
+        secret_field = ITEM_TYPES[item_type][1]
+        doc[secret_field] = encrypt_password(doc[secret_field], key)
+        docs.append(doc)
+
+    errors = {}
+    if ordered:
+        # Consecutive items of one type go out as one ordered insert; the first
+        # failure stops the batch, like a single ordered insert_many would
+        runs = []
+        for i, (item_type, _) in enumerate(items):
+            if runs and runs[-1][0] == item_type:
+                runs[-1][1].append(i)
+            else:
+                runs.append((item_type, [i]))
+        for n, (item_type, positions) in enumerate(runs):
+            failed = await insert_items(item_type, user_id, [docs[i] for i in positions], ordered=True)
+            errors.update({positions[j]: reason for j, reason in failed.items()})
+            if failed:
+                errors.update({i: "Not attempted" for _, rest in runs[n + 1:] for i in rest})
+                break
+    else:
+        by_type = {}
+        for i, (item_type, _) in enumerate(items):
+            by_type.setdefault(item_type, []).append(i)
+
+        async def write(item_type, positions):
+            failed = await insert_items(item_type, user_id, [docs[i] for i in positions])
+            return {positions[j]: reason for j, reason in failed.items()}
+
+        for failed in await asyncio.gather(*(write(t, positions) for t, positions in by_type.items())):
+            errors.update(failed)
+
+    results = [
+        {"index": i, "type": item_type, "id": None, "error": errors[i]} if i in errors
+        else {"index": i, "type": item_type, "id": str(docs[i]["_id"]), "error": None}
+        for i, (item_type, _) in enumerate(items)
+    ]
+    return {"created": len(items) - len(errors), "items": results}
+
+### Export / Import
+
+async def export_items(user_id, decrypt=True):
+    # Async generator so the caller can stream without holding the vault in memory
+    key = await get_user_decryptor(user_id)
+    for item_type, (collection, secret_field, fields) in ITEM_TYPES.items():
+        cursor = collection.find({"user_id": ObjectId(user_id)}, batch_size=EXPORT_BATCH_SIZE)
+        async for doc in cursor:
+            record = {"type": item_type, "id": str(doc["_id"])}
+            record.update({f: doc.get(f) for f in fields})
+            record[secret_field] = await key.decrypt(doc[secret_field]) if decrypt else doc[secret_field]
+            yield record
+
+async def import_items(user_id, records, encrypted=False):
+    # records: async iterable of (line_no, item_type, fields) already validated by the caller
+    key = await get_user_decryptor(user_id)
+    owner = ObjectId(user_id)
+    pending = {item_type: [] for item_type in ITEM_TYPES}
+    imported = 0
+    errors = []
+
+    async def flush(item_type):
+        nonlocal imported
+        batch = pending[item_type]
+        if not batch:
+            return
+        pending[item_type] = []
+        line_nos = [line_no for line_no, _ in batch]
+        docs = [doc for _, doc in batch]
+        failed = await insert_items(item_type, user_id, docs)
+        errors.extend({"line": line_nos[i], "error": failed[i]} for i in sorted(failed))
+        imported += len(docs) - len(failed)
+
+    async for line_no, item_type, fields in records:
+        _, secret_field, _ = ITEM_TYPES[item_type]
+        doc = dict(fields)
+        try:
+            if encrypted:
+                # Pass-through ciphertext must belong to this user's key; mid-rotation
+                # it is moved to the new key so the rotation job cannot miss it
+                doc[secret_field] = await key.reencrypt(doc[secret_field])
+            else:
+                doc[secret_field] = encrypt_password(doc[secret_field], key.cipher)
+        except InvalidToken:
+            errors.append({"line": line_no, "error": "Ciphertext not readable with this vault's key"})
+            continue
+        doc["user_id"] = owner
+        pending[item_type].append((line_no, doc))
+        if len(pending[item_type]) >= IMPORT_BATCH_SIZE:
+            await flush(item_type)
+
+    for item_type in ITEM_TYPES:
+        await flush(item_type)
+    return {"imported": imported, "errors": errors}
@@ -0,0 +1,49 @@
+import secrets
+import string
+from functools import lru_cache
+
+# Characters that break quoting when pasted into shells, JSON or config files
+DEFAULT_EXCLUDE = '"\'\\`'
+
+CHARACTER_CLASSES = {
+    "lower": string.ascii_lowercase,
+    "upper": string.ascii_uppercase,
+    "digits": string.digits,
+    "symbols": string.punctuation,
+}
+
+CHUNK_PASSWORDS = 1000  # passwords drawn per CSPRNG buffer when streaming
+
+@lru_cache(maxsize=256)
+def build_alphabet(classes: tuple = tuple(CHARACTER_CLASSES), exclude: str = DEFAULT_EXCLUDE) -> str:
+    excluded = set(exclude)
+    return "".join(c for name in classes for c in CHARACTER_CLASSES[name] if c not in excluded)
+
+@lru_cache(maxsize=256)
+def _translation(alphabet: str):
+    # Byte b maps to alphabet[b % n] when b < limit; bytes >= limit are rejected so
+    # every character is equally likely. bytes.translate does both in C.
+    n = len(alphabet)
+    limit = 256 - (256 % n)
+    table = bytes(ord(alphabet[b % n]) if b < limit else 0 for b in range(256))
+    rejected = bytes(range(limit, 256))
+    return table, rejected, limit
+
+def _random_chars(alphabet: str, needed: int) -> str:
+    table, rejected, limit = _translation(alphabet)
+    out = b""
+    while len(out) < needed:
+        # Oversample by the rejection rate so one buffer is almost always enough
+        missing = needed - len(out)
+        raw = secrets.token_bytes(missing * 256 // limit + 16)
+        out += raw.translate(table, rejected)
+    return out[:needed].decode("ascii")
+
+def generate_passwords(count: int, length: int, alphabet: str):
+    for start in range(0, count, CHUNK_PASSWORDS):
+        batch = min(CHUNK_PASSWORDS, count - start)
+        chars = _random_chars(alphabet, batch * length)
+        for i in range(batch):
+            yield chars[i * length:(i + 1) * length]
+
+DEFAULT_ALPHABET = build_alphabet()
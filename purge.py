@@ -0,0 +1,137 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+from bson import ObjectId
+from db_config import db
+from leader import JobLease
+from operations import ITEM_TYPES
+
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "500"))
+
+purge_jobs = db["purge_jobs"]
+users_collection = db["users"]
+black_collection = db["black"]
+
+# Collections holding per-user documents keyed by user_id
+USER_COLLECTIONS = {item_type: spec[0] for item_type, spec in ITEM_TYPES.items()}
+USER_COLLECTIONS["password_audit"] = db["password_audit"]
+USER_COLLECTIONS["search_index"] = db["search_index"]
+USER_COLLECTIONS["vault_versions"] = db["vault_versions"]
+
+_running = {}  # job_id -> Task; keeps a reference so tasks are not garbage collected
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+async def start_purge(user_id, email=None):
+    # The pepper is captured now: if the email registers again before the purge ends,
+    # only this account's pepper is removed, not the new one
+    record = await black_collection.find_one({"email": email}, projection={"pepper": 1}) if email else None
+    job = {
+        "user_id": ObjectId(user_id),
+        "email": email,
+        "pepper": record["pepper"] if record else None,
+        "status": "pending",
+        "progress": {name: 0 for name in USER_COLLECTIONS},
+        "created_at": _now(),
+        "updated_at": _now(),
+    }
+    result = await purge_jobs.insert_one(job)
+    _spawn(result.inserted_id)
+    return str(result.inserted_id)
+
+
+def _spawn(job_id):
+    if job_id in _running:
+        return
+    task = asyncio.create_task(run_purge(job_id))
+    _running[job_id] = task
+    task.add_done_callback(lambda _: _running.pop(job_id, None))
+
+
+async def run_purge(job_id):
+    # Deletes are by user_id, so re-running a half-finished job simply continues it
+    job = await purge_jobs.find_one({"_id": job_id})
+    if not job or job["status"] == "done":
+        return
+    # Runs in one process at a time; the others wait and take over if its runner dies
+    lease = JobLease(purge_jobs, job_id)
+    while not await lease.acquire():
+        await asyncio.sleep(lease.ttl / 3)
+        job = await purge_jobs.find_one({"_id": job_id})
+        if not job or job["status"] == "done":
+            return
+    await purge_jobs.update_one({"_id": job_id}, {"$set": {"status": "running", "updated_at": _now()}})
+    try:
+        for name, collection in USER_COLLECTIONS.items():
+            while True:
+                batch = collection.find({"user_id": job["user_id"]}, projection={"_id": 1}).limit(PURGE_BATCH_SIZE)
+                ids = [doc["_id"] async for doc in batch]
+                if not ids:
+                    break
+                result = await collection.delete_many({"_id": {"$in": ids}})
+                await purge_jobs.update_one(
+                    {"_id": job_id},
+                    {"$inc": {f"progress.{name}": result.deleted_count}, "$set": {"updated_at": _now()}}
+                )
+        if job.get("email") and job.get("pepper"):
+            await black_collection.delete_one({"email": job["email"], "pepper": job["pepper"]})
+        await purge_jobs.update_one({"_id": job_id}, {"$set": {"status": "done", "updated_at": _now()}})
+    except Exception as e:
+        await purge_jobs.update_one(
+            {"_id": job_id},
+            {"$set": {"status": "failed", "error": str(e), "updated_at": _now()}}
+        )
+        print(f"Purge {job_id} failed: {e}")
+    finally:
+        await lease.release()
+
+
+async def resume_purges():
+    resumed = 0
+    async for job in purge_jobs.find({"status": {"$in": ["pending", "running", "failed"]}}, projection={"_id": 1}):
+        _spawn(job["_id"])
+        resumed += 1
+    return resumed
+
+
+async def get_purge(job_id):
+    if not ObjectId.is_valid(job_id):
+        return None
+    job = await purge_jobs.find_one({"_id": ObjectId(job_id)})
+    if not job:
+        return None
+    return {
+        "id": str(job["_id"]),
+        "user_id": str(job["user_id"]),
+        "status": job["status"],
+        "progress": job["progress"],
+        "error": job.get("error"),
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+
+async def sweep_orphans():
+    # One-off cleanup for data left behind before deletes cascaded
+    owners = set()
+    for collection in USER_COLLECTIONS.values():
+        owners.update(await collection.distinct("user_id"))
+    live = {u["_id"] async for u in users_collection.find({"_id": {"$in": list(owners)}}, projection={"_id": 1})}
+    jobs = [await start_purge(user_id) for user_id in owners - live]
+
+    emails = await black_collection.distinct("email")
+    registered = {u["username"] async for u in users_collection.find({"username": {"$in": emails}}, projection={"username": 1})}
+    pending = {o["email"] async for o in db["pending_otps"].find({"email": {"$in": emails}}, projection={"email": 1})}
+    stale = [e for e in emails if e not in registered and e not in pending]
+    if stale:
+        await black_collection.delete_many({"email": {"$in": stale}})
+    return {"purge_jobs": jobs, "orphan_peppers_removed": len(stale)}
+
+
+def shutdown():
+    # Unfinished jobs keep their status and are resumed by the next lease holder
+    for task in list(_running.values()):
+        task.cancel()
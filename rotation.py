@@ -0,0 +1,268 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from cryptography.fernet import Fernet
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from db_config import db
+from encryptor import rotate_tokens
+from leader import JobLease
+from operations import ITEM_TYPES, KEY_CACHE_TTL, get_user_keys, invalidate_user_key
+
+ROTATION_BATCH_SIZE = int(os.getenv("ROTATION_BATCH_SIZE", "500"))
+ROTATION_WORKERS = int(os.getenv("ROTATION_WORKERS", str(os.cpu_count() or 1)))
+# Other workers may hold the old cipher in their key cache; re-encryption waits until
+# every cache has picked up the new key so nothing is written with the old one afterwards.
+# Reads in the meantime reload a stale cipher on demand (operations.UserCipher).
+ROTATION_GRACE_SECONDS = float(os.getenv("ROTATION_GRACE_SECONDS", str(KEY_CACHE_TTL)))
+# A write that picked up the old cipher just before the grace ran out can still land behind the
+# scan; the old key is only dropped after this settle time and a second sweep for such items.
+ROTATION_SETTLE_SECONDS = float(os.getenv("ROTATION_SETTLE_SECONDS", "60"))
+
+rotation_jobs = db["rotation_jobs"]
+users_collection = db["users"]
+
+_executor = None
+_running = {}  # job_id -> Task; keeps a reference so tasks are not garbage collected
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _utc(value):
+    # pymongo hands back naive UTC datetimes
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=ROTATION_WORKERS)
+    return _executor
+
+
+def _reset_executor(broken):
+    global _executor
+    if _executor is broken:
+        print("Rotation pool broken (a worker died), rebuilding")
+        broken.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+class RotationInProgress(Exception):
+    def __init__(self, job_id):
+        super().__init__(f"Key rotation {job_id} is already running")
+        self.job_id = job_id
+
+
+async def start_rotation(user_id):
+    owner = ObjectId(user_id)
+    if not await users_collection.find_one({"_id": owner}, projection={"_id": 1}):
+        return None
+    active = await rotation_jobs.find_one({"user_id": owner, "active": True}, projection={"_id": 1})
+    if active:
+        raise RotationInProgress(str(active["_id"]))
+    job = {
+        "user_id": owner,
+        "status": "pending",
+        "active": True,
+        "key_switched": False,
+        "progress": {item_type: 0 for item_type in ITEM_TYPES},
+        "unreadable": 0,
+        "checkpoint": {},
+        "reencrypt_after": None,
+        "verify_after": None,
+        "created_at": _now(),
+        "updated_at": _now(),
+    }
+    try:
+        result = await rotation_jobs.insert_one(job)
+    except DuplicateKeyError:
+        active = await rotation_jobs.find_one({"user_id": owner, "active": True}, projection={"_id": 1})
+        raise RotationInProgress(str(active["_id"]) if active else None)
+    job["_id"] = result.inserted_id
+    await _switch_key(job)
+    _spawn(result.inserted_id)
+    return str(result.inserted_id)
+
+
+async def _switch_key(job):
+    # Make a fresh key current and keep the old one readable. Keys already sitting in
+    # old_keys (a crash right after the switch) are finished off instead of stacking another.
+    owner = job["user_id"]
+    user = await users_collection.find_one({"_id": owner}, projection={"key": 1, "old_keys": 1})
+    if not user:
+        raise Exception("User not found or key missing.")
+    if not user.get("old_keys"):
+        await users_collection.update_one(
+            {"_id": owner, "key": user["key"], "old_keys": {"$exists": False}},
+            {"$set": {"key": Fernet.generate_key(), "old_keys": [user["key"]]}}
+        )
+    invalidate_user_key(owner)
+    job["key_switched"] = True
+    job["reencrypt_after"] = _now() + timedelta(seconds=ROTATION_GRACE_SECONDS)
+    await rotation_jobs.update_one(
+        {"_id": job["_id"]},
+        {"$set": {"key_switched": True, "reencrypt_after": job["reencrypt_after"], "updated_at": _now()}}
+    )
+
+
+def _spawn(job_id):
+    if job_id in _running:
+        return
+    task = asyncio.create_task(run_rotation(job_id))
+    _running[job_id] = task
+    task.add_done_callback(lambda _: _running.pop(job_id, None))
+
+
+async def _rotate_batch(keys, tokens):
+    # Spread one batch over the pool; each worker builds its own MultiFernet
+    size = max(1, -(-len(tokens) // ROTATION_WORKERS))
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    try:
+        chunks = await asyncio.gather(*(
+            loop.run_in_executor(executor, rotate_tokens, keys, tokens[i:i + size])
+            for i in range(0, len(tokens), size)
+        ))
+    except BrokenProcessPool:
+        # A killed worker breaks the whole pool; rebuild it and retry the batch once
+        _reset_executor(executor)
+        executor = _get_executor()
+        chunks = await asyncio.gather(*(
+            loop.run_in_executor(executor, rotate_tokens, keys, tokens[i:i + size])
+            for i in range(0, len(tokens), size)
+        ))
+    return [token for chunk in chunks for token in chunk]
+
+
+async def _rotate_collection(job_id, owner, item_type, keys, after):
+    collection, secret_field, _ = ITEM_TYPES[item_type]
+    while True:
+        query = {"user_id": owner}
+        if after:
+            query["_id"] = {"$gt": after}
+        cursor = collection.find(query, projection={secret_field: 1}).sort("_id", 1).limit(ROTATION_BATCH_SIZE)
+        docs = [doc async for doc in cursor]
+        if not docs:
+            return
+        rotated = await _rotate_batch(keys, [doc[secret_field] for doc in docs])
+        # Matching on the old ciphertext leaves anything changed meanwhile alone
+        ops = [
+            UpdateOne({"_id": doc["_id"], secret_field: doc[secret_field]}, {"$set": {secret_field: new}})
+            for doc, new in zip(docs, rotated) if new is not None and new != doc[secret_field]
+        ]
+        unreadable = sum(new is None for new in rotated)
+        if ops:
+            await collection.bulk_write(ops, ordered=False)
+        after = docs[-1]["_id"]
+        await rotation_jobs.update_one(
+            {"_id": job_id},
+            {
+                "$set": {f"checkpoint.{item_type}": after, "updated_at": _now()},
+                "$inc": {f"progress.{item_type}": len(ops), "unreadable": unreadable},
+            }
+        )
+
+
+async def run_rotation(job_id):
+    # Batches are checkpointed by _id, so a restarted job picks up after the last written batch
+    job = await rotation_jobs.find_one({"_id": job_id})
+    if not job or not job.get("active"):
+        return
+    # Runs in one process at a time; the others wait and take over if its runner dies
+    lease = JobLease(rotation_jobs, job_id)
+    while not await lease.acquire():
+        await asyncio.sleep(lease.ttl / 3)
+        job = await rotation_jobs.find_one({"_id": job_id})
+        if not job or not job.get("active"):
+            return
+    owner = job["user_id"]
+    try:
+        if not job["key_switched"]:
+            await _switch_key(job)
+        wait = (_utc(job["reencrypt_after"]) - _now()).total_seconds()
+        await rotation_jobs.update_one({"_id": job_id}, {"$set": {"status": "waiting" if wait > 0 else "verifying" if job.get("verify_after") else "running", "updated_at": _now()}})
+        if wait > 0:
+            await asyncio.sleep(wait)
+            await rotation_jobs.update_one({"_id": job_id}, {"$set": {"status": "running", "updated_at": _now()}})
+
+        keys = await get_user_keys(owner)
+        if not job.get("verify_after"):
+            for item_type in ITEM_TYPES:
+                await _rotate_collection(job_id, owner, item_type, keys, job["checkpoint"].get(item_type))
+            job["verify_after"] = _now() + timedelta(seconds=ROTATION_SETTLE_SECONDS)
+            job["checkpoint"] = {}
+            await rotation_jobs.update_one(
+                {"_id": job_id},
+                {"$set": {"status": "verifying", "verify_after": job["verify_after"], "checkpoint": {}, "updated_at": _now()}}
+            )
+        # Second sweep from the start: only items still on an old key get rewritten
+        wait = (_utc(job["verify_after"]) - _now()).total_seconds()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        for item_type in ITEM_TYPES:
+            await _rotate_collection(job_id, owner, item_type, keys, job["checkpoint"].get(item_type))
+
+        await users_collection.update_one({"_id": owner}, {"$unset": {"old_keys": ""}})
+        invalidate_user_key(owner)
+        await rotation_jobs.update_one(
+            {"_id": job_id},
+            {"$set": {"status": "done", "updated_at": _now()}, "$unset": {"active": ""}}
+        )
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        # Either way the job stops being active, so the user can start another rotation;
+        # old_keys stay readable and the next one finishes the switch this one began
+        status = "cancelled" if not await users_collection.find_one({"_id": owner}, projection={"_id": 1}) else "failed"
+        await rotation_jobs.update_one(
+            {"_id": job_id},
+            {"$set": {"status": status, "error": str(e), "updated_at": _now()}, "$unset": {"active": ""}}
+        )
+        print(f"Key rotation {job_id} {status}: {e}")
+    finally:
+        await lease.release()
+
+
+async def resume_rotations():
+    resumed = 0
+    async for job in rotation_jobs.find({"active": True}, projection={"_id": 1}):
+        _spawn(job["_id"])
+        resumed += 1
+    return resumed
+
+
+async def get_rotation(job_id, user_id=None):
+    if not ObjectId.is_valid(job_id):
+        return None
+    query = {"_id": ObjectId(job_id)}
+    if user_id:
+        query["user_id"] = ObjectId(user_id)
+    job = await rotation_jobs.find_one(query)
+    if not job:
+        return None
+    return {
+        "id": str(job["_id"]),
+        "user_id": str(job["user_id"]),
+        "status": job["status"],
+        "progress": job["progress"],
+        "unreadable": job["unreadable"],
+        "error": job.get("error"),
+        "reencrypt_after": job["reencrypt_after"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+
+def shutdown():
+    global _executor
+    for task in list(_running.values()):
+        task.cancel()
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,91 @@
+import re
+from bson import ObjectId
+from pymongo import ReplaceOne
+from db_config import db
+from operations import ITEM_TYPES, search_collection, search_entry
+
+users_collection = db["users"]
+
+# Matches ranked per query; past this the results are marked truncated
+MAX_CANDIDATES = 5000
+
+# Users whose existing items have been copied into search_index (per process)
+_backfilled = set()
+
+# Score for where the query landed in a field; the item's first field
+# (site, product_name, title, service_name) counts double.
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING = 100, 60, 40, 20
+_WORDS = re.compile(r"[\W_]+")
+
+
+async def ensure_indexed(user_id):
+    # Items created before the search index existed are added on first search
+    if user_id in _backfilled:
+        return
+    owner = ObjectId(user_id)
+    user = await users_collection.find_one({"_id": owner}, projection={"search_indexed": 1})
+    if user and not user.get("search_indexed"):
+        for item_type, (collection, _, fields) in ITEM_TYPES.items():
+            batch = []
+            async for doc in collection.find({"user_id": owner}, projection=dict.fromkeys(fields, 1), batch_size=1000):
+                batch.append(search_entry(item_type, doc["_id"], user_id, doc))
+                if len(batch) == 1000:
+                    await _upsert(batch)
+                    batch = []
+            await _upsert(batch)
+        await users_collection.update_one({"_id": owner}, {"$set": {"search_indexed": True}})
+    _backfilled.add(user_id)
+
+
+async def _upsert(entries):
+    if entries:
+        await search_collection.bulk_write([ReplaceOne({"_id": e["_id"]}, e, upsert=True) for e in entries], ordered=False)
+
+
+def _score(query, item_type, fields):
+    primary = ITEM_TYPES[item_type][2][0]
+    best = 0
+    for name, value in fields.items():
+        value = str(value).lower()
+        if value == query:
+            score = EXACT
+        elif value.startswith(query):
+            score = PREFIX
+        elif any(word.startswith(query) for word in _WORDS.split(value)):
+            score = WORD_PREFIX
+        elif query in value:
+            score = SUBSTRING
+        else:
+            continue
+        best = max(best, score * (2 if name == primary else 1))
+    return best
+
+
+async def search_vault(user_id, query, types=None, limit=20, offset=0):
+    await ensure_indexed(user_id)
+    query = query.strip().lower()
+    criteria = {"user_id": ObjectId(user_id), "text": {"$regex": re.escape(query)}}
+    if types:
+        criteria["type"] = {"$in": list(types)}
+    # One extra candidate tells a vault with exactly MAX_CANDIDATES matches from a larger one
+    cursor = search_collection.find(criteria, projection={"type": 1, "fields": 1}).limit(MAX_CANDIDATES + 1)
+    candidates = [entry async for entry in cursor]
+    truncated = len(candidates) > MAX_CANDIDATES
+
+    ranked = []
+    for entry in candidates[:MAX_CANDIDATES]:
+        score = _score(query, entry["type"], entry["fields"])
+        if score:
+            # Ties go to the shorter primary value, then to the older item
+            primary = entry["fields"].get(ITEM_TYPES[entry["type"]][2][0], "")
+            ranked.append((-score, len(str(primary)), entry["_id"], entry))
+    ranked.sort(key=lambda r: r[:3])
+
+    return {
+        "total": len(ranked),
+        "truncated": truncated,
+        "results": [
+            {"type": entry["type"], "id": str(entry["_id"]), "score": -neg_score, **entry["fields"]}
+            for neg_score, _, _, entry in ranked[offset:offset + limit]
+        ],
+    }
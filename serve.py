@@ -0,0 +1,166 @@
+"""Pre-forking server: imports the app once, then forks workers that share one listening socket.
+
+    python serve.py --workers 4 --port 8000
+
+SIGTERM or Ctrl+C stops accepting connections and lets every worker finish its
+in-flight requests (up to --graceful-timeout seconds) before exiting. A worker
+that dies is replaced. Scheduled jobs run in whichever worker holds the Mongo
+"scheduler" lease, so they fire once however many workers there are.
+
+Workers share Prometheus metrics through PROMETHEUS_MULTIPROC_DIR (a temporary
+directory unless set), so /metrics reports every worker whichever one answers.
+Rate limits are only shared with RATE_LIMIT_BACKEND=mongo. Unless HASH_WORKERS or
+ROTATION_WORKERS is set, each worker's bcrypt and rotation pools get cores // workers processes.
+"""
+import argparse
+import glob
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+import uvicorn
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+RESTART_BACKOFF_SECONDS = 1
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))))
+    parser.add_argument("--graceful-timeout", type=float, default=float(os.getenv("GRACEFUL_TIMEOUT", "30")))
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    return parser.parse_args()
+
+
+def bind(host, port, backlog):
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def prepare_metrics_dir():
+    # Must be in the environment before prometheus_client is first imported
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if not path:
+        path = tempfile.mkdtemp(prefix="securepass-metrics-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+        return path, True
+    os.makedirs(path, exist_ok=True)
+    # Files left by a previous run would be counted as live workers
+    for stale in glob.glob(os.path.join(path, "*.db")):
+        os.remove(stale)
+    return path, False
+
+
+def share_cores(workers):
+    # hashing.py and rotation.py size their process pools from these when imported; left at the
+    # cpu_count default, every worker would start a full-size pool and oversubscribe the cores
+    per_worker = str(max(1, (os.cpu_count() or 1) // workers))
+    for name in ("HASH_WORKERS", "ROTATION_WORKERS"):
+        os.environ.setdefault(name, per_worker)
+
+
+def run_worker(app, sock, args):
+    # Own process group: a terminal Ctrl+C reaches only the supervisor, which sends one
+    # SIGTERM. A second signal would make uvicorn skip draining.
+    os.setpgid(0, 0)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    config = uvicorn.Config(
+        app,
+        log_level=args.log_level,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        backlog=args.backlog,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    args = parse_args()
+    sys.path.insert(0, ROOT)
+    if args.workers > 1 and os.getenv("RATE_LIMIT_BACKEND", "memory") != "mongo":
+        print(f"WARNING: RATE_LIMIT_BACKEND is not 'mongo'; each of the {args.workers} workers keeps its "
+              f"own rate-limit buckets, so every limit is effectively {args.workers}x higher")
+    metrics_dir, temporary = prepare_metrics_dir()
+    share_cores(args.workers)
+    # Imported once here; workers inherit the loaded modules instead of each importing them.
+    # Nothing at import time opens connections or threads, so forking afterwards is safe.
+    from main import app
+    from prometheus_client import multiprocess
+
+    sock = bind(args.host, args.port, args.backlog)
+    children = {}  # pid -> start time
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(app, sock, args)
+            except BaseException as e:
+                print(f"Worker {os.getpid()} crashed: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        if stopping:
+            return
+        stopping = True
+        print(f"Shutting down {len(children)} worker(s), draining requests")
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print(f"Serving on {args.host}:{args.port} with {args.workers} worker(s)")
+    for _ in range(args.workers):
+        spawn()
+
+    deadline = None
+    while children:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            if stopping:
+                # Past the drain window plus some slack, stop waiting on stuck workers
+                deadline = deadline or time.monotonic() + args.graceful_timeout + 5
+                if time.monotonic() > deadline:
+                    for child in children:
+                        try:
+                            os.kill(child, signal.SIGKILL)
+                        except ProcessLookupError:
+                            pass
+            time.sleep(0.2)
+            continue
+        started = children.pop(pid, None)
+        multiprocess.mark_process_dead(pid)
+        if started is None or stopping:
+            continue
+        print(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+        if time.monotonic() - started < RESTART_BACKOFF_SECONDS:
+            time.sleep(RESTART_BACKOFF_SECONDS)
+        spawn()
+    sock.close()
+    if temporary:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,36 @@
 import math
+import os
 import string
+from functools import lru_cache
+
+CHARSET_SIZES = {
+    "l": 26,                       # lowercase
+    "u": 26,                       # uppercase
+    "d": 10,                       # digits
+    "p": len(string.punctuation),  # punctuation
+}
+UNICODE_CHARSET = 100  # Unicode chars assumed
+# 2 ** bits overflows a float past ~1024; anything near that reads as "years" regardless
+MAX_CRACK_BITS = 1000
+
+# Maps every ASCII char to its class marker (or deletes it) so one
+# str.translate pass classifies the whole password at C speed.
+_CLASS_TABLE = {c: None for c in range(128)}
+_CLASS_TABLE.update({ord(c): "l" for c in string.ascii_lowercase})
+_CLASS_TABLE.update({ord(c): "u" for c in string.ascii_uppercase})
+_CLASS_TABLE.update({ord(c): "d" for c in string.digits})
+_CLASS_TABLE.update({ord(c): "p" for c in string.punctuation})
+
+COMMON_PASSWORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "common_passwords.txt")
+
+LEET = str.maketrans({"0": "o", "1": "l", "3": "e", "4": "a", "5": "s", "7": "t", "@": "a", "$": "s", "!": "i"})
+KEYBOARD_ROWS = ("`1234567890-=", "qwertyuiop[]\\", "asdfghjkl;'", "zxcvbnm,./")
 
 def get_charset_size(password: str) -> int:
-    charset = 0
-    if any(c in string.ascii_lowercase for c in password):
-        charset += 26
-    if any(c in string.ascii_uppercase for c in password):
-        charset += 26
-    if any(c in string.digits for c in password):
-        charset += 10
-    if any(c in string.punctuation for c in password):
-        charset += len(string.punctuation)
-    if any(ord(c) > 127 for c in password):
-        charset += 100  # Unicode chars assumed
+    classes = set(password.translate(_CLASS_TABLE))
+    charset = sum(size for cls, size in CHARSET_SIZES.items() if cls in classes)
+    if not password.isascii():
+        charset += UNICODE_CHARSET
     return charset
 
 def calculate_entropy(password: str) -> (float, int):
@@ -41,6 +59,12 @@ def convert_seconds(seconds: float) -> str:
         return f"{seconds:.2f} seconds"
 
 def estimate_crack_times(entropy_bits: float) -> dict:
+    # A fresh dict per call, so callers can't change what the cache hands out
+    return dict(_crack_times(min(entropy_bits, MAX_CRACK_BITS)))
+
+@lru_cache(maxsize=4096)
+def _crack_times(entropy_bits: float) -> tuple:
+    # Cached: batches contain many passwords with identical entropy
     total_combinations = 2 ** entropy_bits
 
     attack_speeds = {
@@ -59,7 +83,7 @@ def estimate_crack_times(entropy_bits: float) -> dict:
         seconds = guesses / speed
         times[method] = convert_seconds(seconds)
 
-    return times
+    return tuple(times.items())
 
 def get_verdict(entropy_bits: float) -> str:
     if entropy_bits < 40:
@@ -72,3 +96,74 @@ def get_verdict(entropy_bits: float) -> str:
         return "Strong"
     else:
         return "Very Strong"
+
+### Pattern-aware estimator
+
+@lru_cache(maxsize=1)
+def common_password_ranks() -> dict:
+    # Loaded on first use only; line order is frequency rank
+    with open(COMMON_PASSWORDS_PATH, encoding="utf-8") as f:
+        words = [line.strip().lower() for line in f if line.strip()]
+    return {word: rank for rank, word in enumerate(words, start=1)}
+
+def _is_sequence(password: str) -> bool:
+    if len(password) < 3:
+        return False
+    steps = {ord(b) - ord(a) for a, b in zip(password, password[1:])}
+    return steps in ({1}, {-1})
+
+def _is_keyboard_walk(password: str) -> bool:
+    lowered = password.lower()
+    return len(lowered) >= 4 and any(lowered in row or lowered in row[::-1] for row in KEYBOARD_ROWS)
+
+def pattern_entropy(password: str) -> float | None:
+    """Entropy of the cheapest recognised pattern, or None when nothing matches."""
+    if not password:
+        return None
+    ranks = common_password_ranks()
+    lowered = password.lower()
+    case_bits = 1.0 if lowered != password else 0.0
+    candidates = []
+
+    for word, leet_bits in ((lowered, 0.0), (lowered.translate(LEET), 1.0)):
+        if word in ranks:
+            candidates.append(math.log2(ranks[word]) + case_bits + leet_bits)
+        # common word + digits/symbols suffix, e.g. "Dragon2024!"
+        base = word.rstrip(string.digits + string.punctuation)
+        if base != word and base in ranks:
+            suffix = password[len(base):]
+            candidates.append(
+                math.log2(ranks[base]) + case_bits + leet_bits + len(suffix) * math.log2(max(get_charset_size(suffix), 1))
+            )
+
+    repeated = len(set(password)) == 1
+    walked = _is_sequence(password) or _is_keyboard_walk(password)
+    if repeated or walked:
+        # Characters outside every class (e.g. whitespace) give a charset of 0; count them as one symbol
+        charset_bits = math.log2(max(get_charset_size(password), 1))
+        if repeated:
+            candidates.append(charset_bits + math.log2(len(password)))
+        if walked:
+            candidates.append(charset_bits + math.log2(len(password)) + 1)
+
+    return round(min(candidates), 2) if candidates else None
+
+### Scoring
+
+def score_password(password: str, estimator: str = "charset") -> dict:
+    entropy_bits, charset_size = calculate_entropy(password)
+    if estimator == "pattern":
+        patterned = pattern_entropy(password)
+        if patterned is not None and patterned < entropy_bits:
+            entropy_bits = patterned
+    times = estimate_crack_times(entropy_bits)
+    return {
+        "length": len(password),
+        "charset_size": charset_size,
+        "entropy_bits": entropy_bits,
+        "estimated_crack_times": times,
+        "verdict": get_verdict(entropy_bits),
+    }
+
+def score_passwords(passwords, estimator: str = "charset") -> list:
+    return [score_password(p, estimator) for p in passwords]
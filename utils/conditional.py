@@ -0,0 +1,51 @@
+import hashlib
+import os
+from fastapi import Request, Response
+from cache import TTLCache
+from operations import get_versions
+from utils.pagination import set_next_cursor
+
+# (user_id, item_type, limit, after) -> (version, items, next_cursor). A write bumps the
+# version and the next read overwrites the entry in place, so each page is held once. Only
+# paginated pages (at most MAX_PAGE_SIZE items) are cached; a full unpaginated list is not.
+LIST_CACHE_SIZE = int(os.getenv("LIST_CACHE_SIZE", "1024"))
+list_cache = TTLCache(maxsize=LIST_CACHE_SIZE, ttl=float(os.getenv("LIST_CACHE_TTL", "300")), name="list") if LIST_CACHE_SIZE else None
+
+
+def make_etag(user_id, *parts):
+    raw = ":".join(str(p) for p in (user_id, *parts))
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+async def conditional_list(request: Request, response: Response, user_id, item_type, view, page):
+    # Read the version before the items: a write landing in between then only
+    # makes this response look older than it is, never newer.
+    version = (await get_versions(user_id))[item_type]
+    etag = make_etag(user_id, item_type, version, page.limit, page.after)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    cache = list_cache if page.limit else None
+    key = (user_id, item_type, page.limit, page.after)
+    cached = cache.get(key) if cache else None
+    if cached is not None and cached[0] == version:
+        _, items, next_cursor = cached
+    else:
+        items, next_cursor = await view(user_id, page.limit, page.after)
+        if cache:
+            cache.set(key, (version, items, next_cursor))
+    response.headers["ETag"] = etag
+    set_next_cursor(response, next_cursor)
+    return items
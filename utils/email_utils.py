@@ -5,13 +5,54 @@ import os
 
 load_dotenv() 
 
-def send_otp_email(to_email: str, otp: str):
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+SMTP_SSL = os.getenv("SMTP_SSL", "true").lower() == "true"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "20"))
+
+OTP_SUBJECT = "Verify your email - SecurePassVault"
+
+def otp_body(otp: str) -> str:
+    return f"Your SecurePassVault registration OTP is: {otp}"
+
+def build_message(to_email: str, subject: str, body: str) -> EmailMessage:
     msg = EmailMessage()
-    msg.set_content(f"Your SecurePassVault registration OTP is: {otp}")
-    msg["Subject"] = "Verify your email - SecurePassVault"
-    msg["From"] = os.getenv("EMAIL_SENDER")  
+    msg.set_content(body)
+    msg["Subject"] = subject
+    msg["From"] = os.getenv("EMAIL_SENDER")
     msg["To"] = to_email
+    return msg
+
+class SMTPSession:
+    """One SMTP connection kept open across sends; reconnects when the server drops it."""
+
+    def __init__(self):
+        self._smtp = None
+
+    def _connect(self):
+        if SMTP_SSL:
+            smtp = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        else:
+            smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        password = os.getenv("EMAIL_PASSWORD")
+        if password:
+            smtp.login(os.getenv("EMAIL_SENDER"), password)
+        self._smtp = smtp
+
+    def send(self, msg: EmailMessage):
+        if self._smtp is None:
+            self._connect()
+        try:
+            self._smtp.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # Idle connections get closed server-side; retry once on a fresh one
+            self._connect()
+            self._smtp.send_message(msg)
 
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465) as smtp:
-        smtp.login(os.getenv("EMAIL_SENDER"), os.getenv("EMAIL_PASSWORD"))
-        smtp.send_message(msg)
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
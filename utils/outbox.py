@@ -0,0 +1,133 @@
+import asyncio
+import os
+import smtplib
+from datetime import datetime, timedelta, timezone
+from pymongo import ReturnDocument
+from starlette.concurrency import run_in_threadpool
+from db_config import db
+from utils.email_utils import SMTPSession, SMTP_TIMEOUT, build_message
+
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "2"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+OUTBOX_IDLE_CLOSE_SECONDS = float(os.getenv("OUTBOX_IDLE_CLOSE_SECONDS", "60"))
+# Each message is locked on its own, so the lock only has to outlast one send: connect,
+# login and send, retried once on a dropped connection, each bounded by SMTP_TIMEOUT
+OUTBOX_LOCK_SECONDS = max(120, SMTP_TIMEOUT * 6)
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 900
+
+outbox_collection = db["email_outbox"]
+
+_wakeup = None
+_workers = []
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _wake():
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+async def enqueue_email(to_email, subject, body):
+    # Durable first: the message survives a restart even if no sender picks it up yet
+    result = await outbox_collection.insert_one({
+        "to": to_email,
+        "subject": subject,
+        "body": body,
+        "status": "queued",
+        "attempts": 0,
+        "next_attempt_at": _now(),
+        "created_at": _now(),
+    })
+    _wake()
+    return str(result.inserted_id)
+
+
+async def _claim():
+    # The next due message, or one whose sender died holding the lock
+    now = _now()
+    return await outbox_collection.find_one_and_update(
+        {"$or": [
+            {"status": "queued", "next_attempt_at": {"$lte": now}},
+            {"status": "sending", "locked_until": {"$lte": now}},
+        ]},
+        {"$set": {"status": "sending", "locked_until": now + timedelta(seconds=OUTBOX_LOCK_SECONDS)}},
+        sort=[("next_attempt_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def _send(session, doc):
+    # Runs in a worker thread; consecutive messages reuse the worker's SMTP session
+    try:
+        session.send(build_message(doc["to"], doc["subject"], doc["body"]))
+    except Exception as e:
+        if not isinstance(e, smtplib.SMTPResponseException):
+            session.close()  # connection state unknown; start clean next time
+        return e
+    return None
+
+
+async def _record(doc, error):
+    # Only while this sender's claim still holds; if the lock lapsed and another
+    # sender reclaimed the message, its outcome is the one that counts
+    claim = {"_id": doc["_id"], "status": "sending", "locked_until": doc["locked_until"]}
+    if error is None:
+        update = {"status": "sent", "sent_at": _now(), "finished_at": _now()}
+    else:
+        attempts = doc["attempts"] + 1
+        update = {"attempts": attempts, "last_error": str(error)}
+        if attempts >= OUTBOX_MAX_ATTEMPTS:
+            update.update({"status": "failed", "finished_at": _now()})
+        else:
+            delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+            update.update({"status": "queued", "next_attempt_at": _now() + timedelta(seconds=delay)})
+    result = await outbox_collection.update_one(claim, {"$set": update, "$unset": {"locked_until": ""}})
+    if not result.matched_count:
+        print(f"Outbox message {doc['_id']} was reclaimed before its result was recorded")
+
+
+async def _worker():
+    session = SMTPSession()
+    last_sent = None
+    try:
+        while True:
+            try:
+                doc = await _claim()
+                if doc:
+                    await _record(doc, await run_in_threadpool(_send, session, doc))
+                    last_sent = asyncio.get_running_loop().time()
+                    continue
+                if last_sent and asyncio.get_running_loop().time() - last_sent > OUTBOX_IDLE_CLOSE_SECONDS:
+                    await run_in_threadpool(session.close)
+                    last_sent = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Outbox worker error: {e}")
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            _wakeup.clear()
+    finally:
+        await run_in_threadpool(session.close)
+
+
+def start_outbox():
+    global _wakeup
+    if _workers:
+        return
+    _wakeup = asyncio.Event()
+    _workers.extend(asyncio.create_task(_worker()) for _ in range(OUTBOX_WORKERS))
+
+
+async def stop_outbox():
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
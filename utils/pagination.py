@@ -0,0 +1,21 @@
+from fastapi import HTTPException, Query, Response
+from bson import ObjectId
+
+MAX_PAGE_SIZE = 1000
+
+
+class PageParams:
+    def __init__(
+        self,
+        limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+        after: str | None = Query(None, description="next cursor from the previous page"),
+    ):
+        if after is not None and not ObjectId.is_valid(after):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        self.limit = limit
+        self.after = after
+
+
+def set_next_cursor(response: Response, next_cursor):
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
@@ -0,0 +1,122 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException, Request
+from pymongo import ReturnDocument
+
+# route -> {scope: (burst capacity, seconds to refill the whole bucket)}
+DEFAULT_LIMITS = {
+    "register": {"ip": (5, 60), "email": (3, 600)},
+    "verify-otp": {"ip": (10, 60), "email": (5, 600)},
+    "token": {"ip": (10, 60), "email": (5, 60)},
+    "pepper": {"ip": (30, 60), "email": (10, 60)},
+    "generate": {"ip": (10, 60)},
+}
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() == "true"
+# Proxies we run behind, each appending the address it saw to X-Forwarded-For
+RATE_LIMIT_PROXY_HOPS = max(1, int(os.getenv("RATE_LIMIT_PROXY_HOPS", "1")))
+
+
+def _load_limits():
+    # RATE_LIMITS='{"token": {"ip": [20, 60]}}' overrides individual route/scope pairs
+    limits = {route: dict(scopes) for route, scopes in DEFAULT_LIMITS.items()}
+    for route, scopes in json.loads(os.getenv("RATE_LIMITS", "{}")).items():
+        limits.setdefault(route, {}).update({scope: tuple(v) for scope, v in scopes.items()})
+    return limits
+
+
+LIMITS = _load_limits()
+
+
+class InMemoryBackend:
+    """Per-process buckets; bounded so a flood of distinct keys cannot grow memory forever."""
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    async def take(self, key, capacity, rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+
+class MongoBackend:
+    """Buckets shared by every worker, refilled and drawn in one atomic pipeline update."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def take(self, key, capacity, rate):
+        now = datetime.now(timezone.utc)
+        elapsed = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        refilled = {"$min": [capacity, {"$add": [{"$ifNull": ["$tokens", capacity]}, {"$multiply": [elapsed, rate]}]}]}
+        doc = await self.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updated_at": now}},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                {"$set": {
+                    "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    # A bucket idle long enough to be full again carries no state
+                    "expires_at": now + timedelta(seconds=capacity / rate),
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return doc["allowed"], 0 if doc["allowed"] else (1 - doc["tokens"]) / rate
+
+
+def _make_backend():
+    if RATE_LIMIT_BACKEND == "mongo":
+        from db_config import db
+        return MongoBackend(db["rate_limits"])
+    return InMemoryBackend()
+
+
+backend = _make_backend()
+
+
+def client_ip(request: Request):
+    # Clients can send any X-Forwarded-For they like and proxies append to it, so only the
+    # entry added by the outermost trusted proxy (counting from the right) is the real peer
+    if RATE_LIMIT_TRUST_PROXY:
+        forwarded = [ip.strip() for ip in request.headers.get("x-forwarded-for", "").split(",") if ip.strip()]
+        if forwarded:
+            return forwarded[-min(RATE_LIMIT_PROXY_HOPS, len(forwarded))]
+    return request.client.host if request.client else "unknown"
+
+
+async def enforce(request: Request, route: str, email: str | None = None):
+    # Call before any bcrypt, SMTP or Mongo work in the endpoint
+    scopes = LIMITS.get(route, {})
+    checks = [("ip", client_ip(request))]
+    if email:
+        checks.append(("email", email.strip().lower()))
+    for scope, value in checks:
+        if scope not in scopes:
+            continue
+        capacity, per_seconds = scopes[scope]
+        allowed, retry_after = await backend.take(f"{route}:{scope}:{value}", capacity, capacity / per_seconds)
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, slow down",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
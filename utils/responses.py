@@ -0,0 +1,19 @@
+import orjson
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse
+
+
+def _default(value):
+    # orjson handles datetime, UUID and dataclasses itself; ObjectId is the only BSON type we leak
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class VaultJSONResponse(ORJSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)